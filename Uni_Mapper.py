@@ -1,6 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
+import queue
+import socket
+import struct
+import collections
+import argparse
+import selectors
+import glob
 import pygame
 import time
 import json
@@ -14,10 +21,27 @@ try:
 except ImportError:
     ctypes = None
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 from pynput.keyboard import Controller as KeyboardController, Key
 from pynput.mouse import Controller as MouseController, Button, Listener as MouseListener
 from pynput.keyboard import Listener as KeyboardListener
 
+KEY_MAP = {
+    'space': Key.space, 'enter': Key.enter, 'escape': Key.esc, 'tab': Key.tab,
+    'shift': Key.shift, 'ctrl': Key.ctrl, 'alt': Key.alt, 'backspace': Key.backspace,
+    'rshift': Key.shift_r, 'rctrl': Key.ctrl_r, 'ralt': Key.alt_r,
+    'delete': Key.delete, 'up': Key.up, 'down': Key.down, 'left': Key.left, 'right': Key.right,
+    'f1': Key.f1, 'f2': Key.f2, 'f3': Key.f3, 'f4': Key.f4, 'f5': Key.f5, 'f6': Key.f6,
+    'f7': Key.f7, 'f8': Key.f8, 'f9': Key.f9, 'f10': Key.f10, 'f11': Key.f11, 'f12': Key.f12
+}
+MODIFIER_KEYS = {Key.shift, Key.ctrl, Key.alt, Key.shift_r, Key.ctrl_r, Key.alt_r}
+MOUSE_BUTTONS = {'mouse_left': Button.left, 'mouse_right': Button.right, 'mouse_middle': Button.middle}
+THROTTLE_KEYS = {'throttle_fwd': 'w', 'throttle_rev': 's'}  # W for forward throttle, S for reverse
+
 def is_admin():
     """Check if the script is running with administrative privileges."""
     if ctypes:
@@ -35,8 +59,921 @@ def check_pip_module(module_name):
     except ImportError:
         return False
 
+class UIBridge:
+    """Thread-safe message queue drained by a single periodic Tk tick.
+
+    Worker threads post (topic, key, payload) messages. Each tick coalesces them:
+    'batch' topics hand every payload to the handler in one call, every other
+    topic keeps only the latest payload per key (so repeated rebuilds collapse to one).
+    """
+    def __init__(self, root, interval_ms=16, max_messages=2000):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_messages = max_messages
+        self.queue = queue.SimpleQueue()
+        self.handlers = {}
+        self.policies = {}
+        self.running = False
+
+    def register(self, topic, handler, policy='latest'):
+        self.handlers[topic] = handler
+        self.policies[topic] = policy
+
+    def post(self, topic, payload=None, key=None):
+        self.queue.put((topic, key, payload))
+
+    def start(self):
+        self.running = True
+        self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self.running = False
+
+    def _tick(self):
+        if not self.running: return
+        try:
+            self.drain()
+        finally:
+            self.root.after(self.interval_ms, self._tick)
+
+    def drain(self):
+        latest, batches = {}, {}
+        for _ in range(self.max_messages):
+            try:
+                topic, key, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.policies.get(topic) == 'batch':
+                batches.setdefault(topic, []).append(payload)
+            else:
+                latest[(topic, key)] = payload
+
+        for topic, payloads in batches.items():
+            self._dispatch(topic, payloads)
+        for (topic, _), payload in latest.items():
+            self._dispatch(topic, payload)
+
+    def _dispatch(self, topic, payload):
+        handler = self.handlers.get(topic)
+        if not handler: return
+        try:
+            handler(payload)
+        except Exception as e:
+            print(f"UI bridge error in '{topic}': {e}")
+
+# --- Network input protocol ---
+# Packet: header + N changes. Changes carry absolute values, so repeating them is harmless.
+NET_MAGIC = b'UM'
+NET_VERSION = 1
+NET_FLAG_KEYFRAME = 0x01
+NET_HEADER = struct.Struct('<2sBBIdBBBH')  # magic, version, flags, seq, timestamp, buttons, axes, hats, change count
+NET_CHANGE = struct.Struct('<BBh')  # kind, index, value
+NET_KIND_BUTTON, NET_KIND_AXIS, NET_KIND_HAT = 0, 1, 2
+NET_DEFAULT_PORT = 47800
+NET_RESTART_WINDOW = 64  # keyframes further back than this many packets restart sequence tracking
+
+def encode_input_packet(seq, timestamp, counts, changes, flags=0):
+    """Build a packet from (kind, index, value) changes with values in joystick units."""
+    parts = [NET_HEADER.pack(NET_MAGIC, NET_VERSION, flags, seq & 0xFFFFFFFF, timestamp, *counts, len(changes))]
+    for kind, index, value in changes:
+        if kind == NET_KIND_AXIS:
+            raw = int(round(max(-1.0, min(1.0, value)) * 32767))
+        elif kind == NET_KIND_HAT:
+            raw = (value[0] + 1) * 3 + (value[1] + 1)
+        else:
+            raw = 1 if value else 0
+        parts.append(NET_CHANGE.pack(kind, index, raw))
+    return b''.join(parts)
+
+def decode_input_packet(data):
+    """Return (flags, seq, timestamp, counts, changes) or None for malformed packets."""
+    if len(data) < NET_HEADER.size: return None
+    magic, version, flags, seq, timestamp, nb, na, nh, count = NET_HEADER.unpack_from(data)
+    if magic != NET_MAGIC or version != NET_VERSION: return None
+    if len(data) != NET_HEADER.size + count * NET_CHANGE.size: return None
+    changes = []
+    for kind, index, raw in NET_CHANGE.iter_unpack(data[NET_HEADER.size:]):
+        if kind == NET_KIND_AXIS:
+            changes.append((kind, index, raw / 32767))
+        elif kind == NET_KIND_HAT:
+            changes.append((kind, index, (raw // 3 - 1, raw % 3 - 1)))
+        else:
+            changes.append((kind, index, raw))
+    return flags, seq, timestamp, (nb, na, nh), changes
+
+def read_device_state(device):
+    """Snapshot any object with the pygame Joystick API as (buttons, axes, hats) tuples."""
+    return (tuple(device.get_button(i) for i in range(device.get_numbuttons())),
+            tuple(device.get_axis(i) for i in range(device.get_numaxes())),
+            tuple(tuple(device.get_hat(i)) for i in range(device.get_numhats())))
+
+class VirtualJoystick:
+    """Stand-in for pygame.joystick.Joystick whose state is written by code instead of SDL."""
+    def __init__(self, name, buttons=0, axes=0, hats=0):
+        self.name = name
+        self.buttons = [0] * buttons
+        self.axes = [0.0] * axes
+        self.hats = [(0, 0)] * hats
+
+    def init(self): pass
+    def get_name(self): return self.name
+    def get_numbuttons(self): return len(self.buttons)
+    def get_numaxes(self): return len(self.axes)
+    def get_numhats(self): return len(self.hats)
+    def get_button(self, i): return self.buttons[i]
+    def get_axis(self, i): return self.axes[i]
+    def get_hat(self, i): return self.hats[i]
+
+    def apply_change(self, kind, index, value):
+        target = (self.buttons, self.axes, self.hats)[kind]
+        if index < len(target):
+            target[index] = value
+
+class TraceJoystick(VirtualJoystick):
+    """Replays a recorded JSON trace: {"buttons": n, "axes": n, "hats": n, "frames": [{"t": s, "axes": {"0": v}}]}."""
+    def __init__(self, filename, loop=True):
+        with open(filename, 'r') as f: trace = json.load(f)
+        super().__init__(f"Trace: {os.path.basename(filename)}", trace.get('buttons', 0), trace.get('axes', 0), trace.get('hats', 0))
+        self.frames = sorted(trace.get('frames', []), key=lambda fr: fr.get('t', 0.0))
+        self.duration = self.frames[-1].get('t', 0.0) if self.frames else 0.0
+        self.loop = loop
+        self.start_time = None
+        self.frame_index = 0
+
+    def update(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.start_time is None: self.start_time = now
+        elapsed = now - self.start_time
+        if self.loop and self.duration > 0 and elapsed > self.duration and self.frame_index >= len(self.frames):
+            self.start_time += self.duration
+            self.frame_index = 0
+            elapsed -= self.duration
+        while self.frame_index < len(self.frames) and self.frames[self.frame_index].get('t', 0.0) <= elapsed:
+            frame = self.frames[self.frame_index]
+            for i, v in frame.get('buttons', {}).items(): self.apply_change(NET_KIND_BUTTON, int(i), int(v))
+            for i, v in frame.get('axes', {}).items(): self.apply_change(NET_KIND_AXIS, int(i), float(v))
+            for i, v in frame.get('hats', {}).items(): self.apply_change(NET_KIND_HAT, int(i), tuple(v))
+            self.frame_index += 1
+
+class NetworkInputSender:
+    """Streams state deltas of a local device to a NetworkInputReceiver over UDP.
+
+    Each packet repeats every input that changed in the last `redundancy` packets and a
+    full keyframe goes out every `keyframe_interval` seconds, so isolated losses heal quickly.
+    """
+    def __init__(self, host, port=NET_DEFAULT_PORT, redundancy=3, keyframe_interval=0.5, heartbeat_interval=0.1):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.redundancy = redundancy
+        self.keyframe_interval = keyframe_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.seq = 0
+        self.last_state = None
+        self.recent = collections.deque(maxlen=redundancy)
+        self.last_send = 0.0
+        self.last_keyframe = 0.0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+
+    def send_state(self, state, now=None):
+        """Send the delta between `state` and the previous call. Returns True if a packet went out."""
+        now = time.monotonic() if now is None else now
+        buttons, axes, hats = state
+        keyframe = self.last_state is None or now - self.last_keyframe >= self.keyframe_interval
+        if keyframe or tuple(map(len, self.last_state)) != tuple(map(len, state)):
+            keyframe = True
+            changed = {(k, i) for k, values in enumerate(state) for i in range(len(values))}
+            self.recent.clear()  # indices from before a shape change may no longer exist
+        else:
+            changed = {(k, i) for k, values in enumerate(state) for i, v in enumerate(values) if v != self.last_state[k][i]}
+        self.last_state = state
+        if not changed and now - self.last_send < self.heartbeat_interval:
+            return False
+
+        pending = changed if keyframe else changed.union(*self.recent)
+        self.recent.append(changed)
+        changes = [(k, i, state[k][i]) for k, i in sorted(pending)]
+        counts = (len(buttons), len(axes), len(hats))
+        packet = encode_input_packet(self.seq, time.time(), counts, changes, NET_FLAG_KEYFRAME if keyframe else 0)
+        self.sock.sendto(packet, self.address)
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        self.packets_sent += 1
+        self.bytes_sent += len(packet)
+        self.last_send = now
+        if keyframe: self.last_keyframe = now
+        return True
+
+    def run(self, device, rate_hz=250, should_run=lambda: True):
+        interval = 1.0 / rate_hz
+        while should_run():
+            if isinstance(device, TraceJoystick): device.update()
+            else: pygame.event.pump()
+            self.send_state(read_device_state(device))
+            time.sleep(interval)
+
+    def close(self):
+        self.sock.close()
+
+class NetworkInputReceiver:
+    """Receives UDP input packets on a background thread and exposes them as a VirtualJoystick.
+
+    Only one sending host is followed at a time: packets from any other host are rejected
+    until the current one has been silent for `timeout`. `allowed_hosts` (names or
+    addresses) restricts which hosts may send at all.
+    """
+    def __init__(self, port=NET_DEFAULT_PORT, host='0.0.0.0', timeout=1.0, allowed_hosts=None):
+        self.bind_address = (host, port)
+        self.timeout = timeout
+        self.allowed_hosts = list(allowed_hosts) if allowed_hosts else None
+        self.allowed_addresses = None
+        self.sock = None
+        self.thread = None
+        self.running = False
+        self.device = None
+        self.peer = None
+        self.last_seq = None
+        self.last_packet_time = 0.0
+        self.packets_received = 0
+        self.packets_lost = 0
+        self.packets_stale = 0
+        self.packets_malformed = 0
+        self.packets_rejected = 0
+        self.clock_offsets = collections.deque(maxlen=500)  # receive time - send time, in ms
+        self.arrivals = collections.deque(maxlen=500)
+
+    @property
+    def address(self):
+        return self.sock.getsockname() if self.sock else self.bind_address
+
+    @property
+    def connected(self):
+        return self.device is not None and time.monotonic() - self.last_packet_time < self.timeout
+
+    def start(self):
+        if self.allowed_hosts:
+            self.allowed_addresses = {socket.gethostbyname(h) for h in self.allowed_hosts}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.bind_address)
+        self.sock.settimeout(0.2)
+        self.running = True
+        self.thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread: self.thread.join(timeout=1.0)
+        if self.sock: self.sock.close()
+        self.sock = None
+
+    def _receive_loop(self):
+        while self.running:
+            try:
+                data, peer = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.handle_packet(data, peer)
+
+    def handle_packet(self, data, peer=None, received_at=None):
+        received_at = time.time() if received_at is None else received_at
+        if peer is not None:
+            # A new port on the same host is a restarted sender; another host must wait its turn
+            if (self.allowed_addresses is not None and peer[0] not in self.allowed_addresses) or \
+                    (self.peer is not None and peer[0] != self.peer[0] and self.connected):
+                self.packets_rejected += 1
+                return False
+        decoded = decode_input_packet(data)
+        if decoded is None:
+            self.packets_malformed += 1
+            return False
+        flags, seq, timestamp, counts, changes = decoded
+
+        if self.last_seq is not None:
+            gap = (seq - self.last_seq) & 0xFFFFFFFF
+            # A new peer, or a keyframe far behind the current sequence, means the sender restarted
+            restarted = peer != self.peer or (flags & NET_FLAG_KEYFRAME and gap >= 0x80000000 and 0x100000000 - gap > NET_RESTART_WINDOW)
+            if restarted:
+                self.last_seq = None
+                self.clock_offsets.clear()
+        if self.last_seq is not None:
+            if gap == 0 or gap >= 0x80000000:
+                self.packets_stale += 1  # duplicate or reordered: newer state already applied
+                return False
+            self.packets_lost += gap - 1
+        self.last_seq = seq
+
+        device = self.device
+        if device is None or peer != self.peer or (device.get_numbuttons(), device.get_numaxes(), device.get_numhats()) != counts:
+            device = VirtualJoystick(f"Network: {peer[0] if peer else 'remote'}", *counts)
+        for kind, index, value in changes:
+            device.apply_change(kind, index, value)
+        self.device, self.peer = device, peer
+
+        self.packets_received += 1
+        self.last_packet_time = time.monotonic()
+        self.clock_offsets.append((received_at - timestamp) * 1000.0)
+        self.arrivals.append(self.last_packet_time)
+        return True
+
+    def stats(self):
+        """Packet counters plus latency estimates.
+
+        Sender and receiver clocks are not synchronised, so each raw sample is one-way
+        latency plus an unknown clock offset. The smallest sample in the window is taken as
+        the offset estimate and latency is reported relative to it (i.e. the delay above the
+        fastest packet seen); on a single machine the baseline is close to the true latency.
+        Jitter is the mean change in transit time between consecutive packets, which the
+        clock offset cancels out of.
+        """
+        offsets = list(self.clock_offsets)
+        baseline = min(offsets) if offsets else 0.0
+        lat = sorted(o - baseline for o in offsets)
+        steps = [abs(b - a) for a, b in zip(offsets, offsets[1:])]
+        span = self.arrivals[-1] - self.arrivals[0] if len(self.arrivals) > 1 else 0.0
+        total = self.packets_received + self.packets_lost
+        return {
+            'received': self.packets_received,
+            'lost': self.packets_lost,
+            'stale': self.packets_stale,
+            'malformed': self.packets_malformed,
+            'rejected': self.packets_rejected,
+            'loss_pct': 100.0 * self.packets_lost / total if total else 0.0,
+            'rate_hz': (len(self.arrivals) - 1) / span if span > 0 else 0.0,
+            'latency_ms_avg': sum(lat) / len(lat) if lat else 0.0,
+            'latency_ms_p95': lat[int(0.95 * (len(lat) - 1))] if lat else 0.0,
+            'latency_ms_max': lat[-1] if lat else 0.0,
+            'jitter_ms': sum(steps) / len(steps) if steps else 0.0,
+            'clock_offset_ms': baseline,
+        }
+
+class InputConditioner:
+    """Signal-conditioning stage that drops redundant samples before any mapping work.
+
+    Axes only count as changed when they move by at least their epsilon, axis-to-button
+    presses release only below a hysteresis band, and button edges arriving inside the
+    debounce window are held back until the window has passed.
+    """
+    def __init__(self, global_settings=None):
+        self.axis_epsilon = 0.01
+        self.epsilon_overrides = {}
+        self.hysteresis = 0.1
+        self.debounce = 0.01
+        if global_settings: self.configure(global_settings)
+        self.buttons = {}
+        self.button_times = {}
+        self.axes = {}
+        self.axis_buttons = {}
+        self.raw_axis_buttons = {}
+        self.hats = {}
+        self.counters = dict.fromkeys(('axis_unchanged', 'axis_sub_epsilon', 'hat_unchanged', 'button_bounce', 'hysteresis_hold'), 0)
+
+    def configure(self, gs):
+        self.axis_epsilon = gs.get('axis_epsilon', self.axis_epsilon)
+        self.epsilon_overrides = {int(i): v for i, v in gs.get('axis_epsilon_overrides', {}).items()}
+        self.hysteresis = gs.get('axis_hysteresis', self.hysteresis)
+        self.debounce = gs.get('button_debounce_ms', self.debounce * 1000.0) / 1000.0
+
+    def reset(self, device=False):
+        """Forget cached axis and hat samples so the next tick re-evaluates every mapping.
+
+        With device=True button and axis-button states are forgotten too, for when the
+        device itself went away and its inputs will be read afresh.
+        """
+        self.axes.clear()
+        self.hats.clear()
+        if device:
+            self.buttons.clear()
+            self.axis_buttons.clear()
+            self.raw_axis_buttons.clear()
+
+    def button_edges(self, states, count, now):
+        edges = []
+        for i in range(count):
+            pressed = states.get(i, 0)
+            if pressed == self.buttons.get(i, 0): continue
+            if now - self.button_times.get(i, float('-inf')) < self.debounce:
+                self.counters['button_bounce'] += 1
+                continue
+            self.buttons[i] = pressed
+            self.button_times[i] = now
+            edges.append((i, pressed))
+        return edges
+
+    def update_axis(self, i, value):
+        """Accept value as the axis' new state.
+
+        Returns (changed, accepted value). The accepted value is returned rather than read
+        back from self.axes, because reset() may clear it from the Tk thread at any time.
+        """
+        last = self.axes.get(i)
+        if last is not None:
+            if value == last:
+                self.counters['axis_unchanged'] += 1
+                return False, last
+            if abs(value - last) < self.epsilon_overrides.get(i, self.axis_epsilon) and value != 0.0:
+                self.counters['axis_sub_epsilon'] += 1
+                return False, last
+        self.axes[i] = value
+        return True, value
+
+    def axis_button(self, i, value, threshold):
+        """Return whether the axis counts as pressed, toggling only outside its hysteresis band."""
+        was_pressed = self.axis_buttons.get(i, False)
+        pressed = value >= threshold - self.hysteresis if was_pressed else value > threshold
+        raw = value > threshold
+        if raw != self.raw_axis_buttons.get(i, False):
+            self.raw_axis_buttons[i] = raw
+            if pressed == was_pressed: self.counters['hysteresis_hold'] += 1  # a plain threshold would have toggled here
+        self.axis_buttons[i] = pressed
+        return pressed
+
+    def update_hat(self, i, value):
+        if self.hats.get(i) == value:
+            self.counters['hat_unchanged'] += 1
+            return False
+        self.hats[i] = value
+        return True
+
+    def suppressed(self):
+        return sum(self.counters.values())
+
+class LayerStack:
+    """A base mode plus momentary/toggle layers, flattened into one lookup table.
+
+    The table is rebuilt (and swapped in as a new dict) only when the stack or the
+    mappings change, so the controller loop resolves any input with a single dict lookup.
+    Empty entries in a layer are transparent and fall through to the layers below.
+    """
+    def __init__(self, mappings, base):
+        self.mappings = mappings
+        self.base = base
+        self.active = []
+        self.table = {}
+        self.rebuild()
+
+    def rebuild(self):
+        table = {k: v for k, v in self.mappings.get(self.base, {}).items() if v}
+        for name in self.active:
+            table.update((k, v) for k, v in self.mappings.get(name, {}).items() if v)
+        self.table = table
+
+    def set_mappings(self, mappings, base):
+        self.mappings = mappings
+        self.base = base
+        self.active = [name for name in self.active if name in mappings]
+        self.rebuild()
+
+    def set_base(self, mode):
+        self.base = mode
+        self.rebuild()
+
+    def push(self, name):
+        if name in self.active: return False
+        self.active.append(name)
+        self.rebuild()
+        return True
+
+    def pop(self, name):
+        if name not in self.active: return False
+        self.active.remove(name)
+        self.rebuild()
+        return True
+
+    def toggle(self, name):
+        return self.pop(name) or self.push(name)
+
+    def describe(self):
+        return ' + '.join(n.replace('_', ' ').title() for n in [self.base] + self.active)
+
+# --- Linux evdev input backend ---
+EVDEV_EVENT = struct.Struct('llHHi')  # struct input_event: timeval sec/usec, type, code, value
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT, SYN_DROPPED = 0, 3
+BTN_MISC, BTN_JOYSTICK, BTN_DIGI, KEY_MAX = 0x100, 0x120, 0x140, 0x2ff
+ABS_X, ABS_HAT0X, ABS_HAT3Y, ABS_MAX = 0x00, 0x10, 0x17, 0x3f
+CLOCK_MONOTONIC = 1
+
+def _evdev_ioc(nr, size, direction=2):
+    return (direction << 30) | (size << 16) | (ord('E') << 8) | nr
+
+EVIOCGNAME = lambda size: _evdev_ioc(0x06, size)
+EVIOCGKEY = lambda size: _evdev_ioc(0x18, size)
+EVIOCGBIT = lambda ev, size: _evdev_ioc(0x20 + ev, size)
+EVIOCGABS = lambda code: _evdev_ioc(0x40 + code, 24)
+EVIOCSCLOCKID = _evdev_ioc(0xa0, 4, direction=1)
+
+def decode_evdev_events(buffer):
+    """Decode every complete input_event in buffer as (timestamp, type, code, value) tuples."""
+    usable = len(buffer) - len(buffer) % EVDEV_EVENT.size
+    return [(sec + usec / 1e6, ev_type, code, value)
+            for sec, usec, ev_type, code, value in EVDEV_EVENT.iter_unpack(memoryview(buffer)[:usable])]
+
+def _evdev_bits(fd, ev, max_code):
+    buf = bytearray((max_code + 8) // 8)
+    fcntl.ioctl(fd, EVIOCGBIT(ev, len(buf)), buf, True)
+    return [code for code in range(max_code + 1) if buf[code // 8] & (1 << (code % 8))]
+
+class EvdevJoystick(VirtualJoystick):
+    """A /dev/input/event* device decoded straight from raw input_event structs.
+
+    Buttons are ordered like SDL does (joystick/gamepad codes first), ABS_HAT* pairs become
+    hats and every other absolute axis is scaled to -1.0..1.0. Kernel timestamps of each
+    SYN_REPORT frame are kept for latency accounting.
+    """
+    def __init__(self, name, key_codes, abs_info, fd=None, path=None):
+        hat_codes = [c for c in abs_info if ABS_HAT0X <= c <= ABS_HAT3Y]
+        self.hat_count = (max(hat_codes) - ABS_HAT0X) // 2 + 1 if hat_codes else 0
+        self.axis_codes = sorted(c for c in abs_info if not ABS_HAT0X <= c <= ABS_HAT3Y)
+        self.key_codes = sorted(key_codes, key=lambda c: (not BTN_JOYSTICK <= c < BTN_DIGI, c))
+        super().__init__(name, len(self.key_codes), len(self.axis_codes), self.hat_count)
+        self.fd = fd
+        self.path = path
+        self.abs_info = abs_info
+        self.button_index = {c: i for i, c in enumerate(self.key_codes)}
+        self.axis_index = {c: i for i, c in enumerate(self.axis_codes)}
+        self.dropped = False
+        self.remainder = b''  # partial input_event left over from a short read
+        self.last_event_time = 0.0
+        self.events_decoded = 0
+        self.latencies = collections.deque(maxlen=500)
+
+    @classmethod
+    def open(cls, path):
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            name_buf = bytearray(256)
+            fcntl.ioctl(fd, EVIOCGNAME(len(name_buf)), name_buf, True)
+            name = name_buf.split(b'\0', 1)[0].decode('utf-8', 'replace') or os.path.basename(path)
+            key_codes = [c for c in _evdev_bits(fd, EV_KEY, KEY_MAX) if c >= BTN_MISC]
+            abs_info = {}
+            for code in _evdev_bits(fd, EV_ABS, ABS_MAX):
+                info = bytearray(24)
+                fcntl.ioctl(fd, EVIOCGABS(code), info, True)
+                _, minimum, maximum, _, _, _ = struct.unpack('6i', info)
+                abs_info[code] = (minimum, maximum)
+            try:
+                fcntl.ioctl(fd, EVIOCSCLOCKID, struct.pack('i', CLOCK_MONOTONIC))
+            except OSError:
+                pass
+        except OSError:
+            os.close(fd)
+            raise
+        device = cls(name, key_codes, abs_info, fd=fd, path=path)
+        device.resync()
+        return device
+
+    @staticmethod
+    def is_joystick(key_codes, abs_info):
+        return ABS_X in abs_info and any(BTN_JOYSTICK <= c < BTN_DIGI for c in key_codes)
+
+    def feed(self, data, now=None):
+        """Apply a buffer of raw input_event structs. Returns the number of events decoded."""
+        now = time.monotonic() if now is None else now
+        if self.remainder:
+            data = self.remainder + data
+        split = len(data) - len(data) % EVDEV_EVENT.size
+        self.remainder = bytes(data[split:])
+        events = decode_evdev_events(memoryview(data)[:split])
+        for timestamp, ev_type, code, value in events:
+            if self.dropped:
+                # Kernel buffer overflowed: skip to the next report, then re-read the full state
+                if ev_type == EV_SYN and code == SYN_REPORT:
+                    self.dropped = False
+                    self.resync()
+                continue
+            if ev_type == EV_KEY:
+                i = self.button_index.get(code)
+                if i is not None: self.buttons[i] = 1 if value else 0
+            elif ev_type == EV_ABS:
+                self._apply_abs(code, value)
+            elif ev_type == EV_SYN:
+                if code == SYN_REPORT:
+                    self.last_event_time = timestamp
+                    self.latencies.append((now - timestamp) * 1000.0)
+                elif code == SYN_DROPPED:
+                    self.dropped = True
+        self.events_decoded += len(events)
+        return len(events)
+
+    def _apply_abs(self, code, value):
+        if ABS_HAT0X <= code <= ABS_HAT3Y:
+            i, is_y = divmod(code - ABS_HAT0X, 2)
+            x, y = self.hats[i]
+            value = max(-1, min(1, value))
+            self.hats[i] = (x, -value) if is_y else (value, y)  # evdev reports up as -1, SDL as +1
+            return
+        i = self.axis_index.get(code)
+        if i is None: return
+        minimum, maximum = self.abs_info[code]
+        self.axes[i] = (value - minimum) / (maximum - minimum) * 2.0 - 1.0 if maximum > minimum else 0.0
+
+    def resync(self):
+        """Re-read the complete key and axis state, e.g. after SYN_DROPPED."""
+        if self.fd is None: return
+        try:
+            keys = bytearray((KEY_MAX + 8) // 8)
+            fcntl.ioctl(self.fd, EVIOCGKEY(len(keys)), keys, True)
+            for code, i in self.button_index.items():
+                self.buttons[i] = 1 if keys[code // 8] & (1 << (code % 8)) else 0
+            for code in self.abs_info:
+                info = bytearray(24)
+                fcntl.ioctl(self.fd, EVIOCGABS(code), info, True)
+                self._apply_abs(code, struct.unpack('6i', info)[0])
+        except OSError:
+            pass  # not an evdev node (e.g. a replayed recording); keep the decoded state
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+class EvdevInputBackend:
+    """Reads evdev devices directly with non-blocking bulk reads multiplexed through selectors (epoll)."""
+    def __init__(self, pattern='/dev/input/event*', rescan_interval=2.0, read_events=256):
+        self.pattern = pattern
+        self.rescan_interval = rescan_interval
+        self.read_size = EVDEV_EVENT.size * read_events
+        self.selector = selectors.DefaultSelector()
+        self.devices = []
+        self.last_scan = float('-inf')
+        self.read_errors = 0
+
+    @property
+    def device(self):
+        return self.devices[0] if self.devices else None
+
+    def scan(self):
+        self.last_scan = time.monotonic()
+        known = {d.path for d in self.devices}
+        for path in sorted(glob.glob(self.pattern)):
+            if path in known: continue
+            try:
+                device = EvdevJoystick.open(path)
+            except OSError:
+                continue  # typically no read permission: add the user to the 'input' group
+            if EvdevJoystick.is_joystick(device.key_codes, device.abs_info):
+                self.add_device(device)
+            else:
+                device.close()
+
+    def add_device(self, device):
+        self.selector.register(device.fd, selectors.EVENT_READ, device)
+        self.devices.append(device)
+
+    def remove_device(self, device):
+        self.selector.unregister(device.fd)
+        self.devices.remove(device)
+        device.close()
+
+    def poll(self, timeout=0):
+        """Drain every readable device. Returns the number of events decoded."""
+        if not self.devices and time.monotonic() - self.last_scan >= self.rescan_interval:
+            self.scan()
+        if not self.devices: return 0
+        decoded = 0
+        for key, _ in self.selector.select(timeout):
+            device = key.data
+            while True:
+                try:
+                    data = os.read(device.fd, self.read_size)
+                except BlockingIOError:
+                    break
+                except OSError:
+                    self.read_errors += 1
+                    self.remove_device(device)  # unplugged
+                    break
+                if not data: break
+                decoded += device.feed(data)
+                if len(data) < self.read_size: break
+        return decoded
+
+    def close(self):
+        for device in list(self.devices):
+            self.remove_device(device)
+        self.selector.close()
+
+class PresetCatalog:
+    """Metadata index of preset files, cached on disk and refreshed incrementally.
+
+    Each file is parsed once; on later refreshes a file is only re-read when its mtime
+    or size changed. Searching matches every query word against a precomputed
+    lowercase haystack of name, game and device.
+    """
+    INDEX_VERSION = 1
+    ENTRY_FIELDS = {'name': str, 'game': str, 'device': str, 'profile_name': str, 'search': str,
+                    'mtime': (int, float), 'size': int, 'last_used': (int, float)}
+
+    def __init__(self, presets_path, index_file):
+        self.presets_path = presets_path
+        self.index_file = index_file
+        self.entries = {}  # relative path -> metadata
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # refresh worker and mark_used may save at once
+        self.refresh_thread = None
+        self.last_query = None
+        self.last_results = []
+
+    def load_cache(self):
+        try:
+            with open(self.index_file, 'r') as f: data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != self.INDEX_VERSION: return
+        entries = data.get('entries')
+        if not isinstance(entries, dict): return
+        # Damaged or hand-edited entries are dropped, so refresh treats those files as new
+        entries = {rel: meta for rel, meta in entries.items() if self._valid_entry(meta)}
+        with self.lock:
+            self.entries = entries
+            self.last_query = None
+
+    @classmethod
+    def _valid_entry(cls, meta):
+        return isinstance(meta, dict) and all(isinstance(meta.get(k), t) for k, t in cls.ENTRY_FIELDS.items())
+
+    def save_cache(self):
+        tmp = f'{self.index_file}.{os.getpid()}.tmp'
+        with self.save_lock:
+            with self.lock:
+                data = json.dumps({'version': self.INDEX_VERSION, 'entries': self.entries})
+            try:
+                with open(tmp, 'w') as f: f.write(data)
+                os.replace(tmp, self.index_file)
+            except OSError as e:
+                print(f"Could not write preset index: {e}")
+
+    def _iter_files(self, folder):
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._iter_files(entry.path)
+                    elif entry.name.endswith('.json'):
+                        yield entry
+        except OSError:
+            return
+
+    @staticmethod
+    def extract_metadata(path, rel_name):
+        """Read game/device info from the preset, falling back to a 'Game (Device)' file name."""
+        base = os.path.basename(rel_name).strip()
+        game, device = base, ''
+        if base.endswith(')') and '(' in base:
+            game, _, device = base[:-1].rpartition('(')
+        meta = {'game': game.strip(), 'device': device.strip(), 'profile_name': base}
+        try:
+            with open(path, 'r') as f: settings = json.load(f).get('settings', {})
+            meta['profile_name'] = settings.get('profile_name') or base
+            meta['game'] = settings.get('game') or meta['game']
+            meta['device'] = settings.get('device') or meta['device']
+        except (OSError, ValueError, AttributeError):
+            meta['invalid'] = True
+        return meta
+
+    def refresh(self):
+        """Rescan the presets folder, parsing only new or modified files. Returns (added/updated, removed)."""
+        with self.lock:
+            old = dict(self.entries)
+        entries, changed = {}, 0
+        for file in self._iter_files(self.presets_path):
+            rel = os.path.relpath(file.path, self.presets_path)
+            try:
+                st = file.stat()
+            except OSError:
+                continue  # deleted or unreadable since the directory was listed
+            cached = old.get(rel)
+            if cached and cached['mtime'] == st.st_mtime and cached['size'] == st.st_size:
+                entries[rel] = cached
+                continue
+            name = os.path.splitext(rel)[0].replace(os.sep, '/')
+            meta = self.extract_metadata(file.path, name)
+            meta.update({'name': name, 'mtime': st.st_mtime, 'size': st.st_size,
+                         'last_used': cached.get('last_used', 0) if cached else 0})
+            meta['search'] = ' '.join((name, meta['game'], meta['device'], meta['profile_name'])).lower()
+            entries[rel] = meta
+            changed += 1
+        removed = len(old.keys() - entries.keys())
+        with self.lock:
+            # Keep last_used stamps that mark_used set while the scan was running
+            for rel, meta in entries.items():
+                current = self.entries.get(rel)
+                if current and current.get('last_used', 0) > meta.get('last_used', 0):
+                    meta['last_used'] = current['last_used']
+            self.entries = entries
+            self.last_query = None
+        if changed or removed:
+            self.save_cache()
+        return changed, removed
+
+    def refresh_async(self, on_done=None):
+        if self.refresh_thread and self.refresh_thread.is_alive(): return
+        def worker():
+            try:
+                result = self.refresh()
+            except Exception as e:
+                print(f"Preset index refresh failed: {e}")
+                result = (0, 0)
+            if on_done: on_done(*result)
+        self.refresh_thread = threading.Thread(target=worker, daemon=True)
+        self.refresh_thread.start()
+
+    def search(self, query='', limit=None):
+        """Entries matching every word of query, most recently used first."""
+        q = query.strip().lower()
+        with self.lock:
+            # Typing narrows the previous result set instead of rescanning everything
+            if self.last_query is not None and q.startswith(self.last_query):
+                candidates = self.last_results
+            else:
+                candidates = sorted(self.entries.items(), key=lambda kv: (-kv[1].get('last_used', 0), kv[1]['name'].lower()))
+            words = q.split()
+            results = [kv for kv in candidates if all(w in kv[1]['search'] for w in words)]
+            self.last_query, self.last_results = q, results
+        return [dict(meta, path=os.path.join(self.presets_path, rel)) for rel, meta in results[:limit]]
+
+    def mark_used(self, path):
+        rel = os.path.relpath(path, self.presets_path)
+        with self.lock:
+            if rel not in self.entries: return
+            self.entries[rel]['last_used'] = time.time()
+            self.last_query = None
+        self.save_cache()
+
+class KeyActionExecutor:
+    """Presses and releases key actions, including multi-key actions such as 'shift,w'.
+
+    Each action string is compiled once into prebuilt press and release sequences
+    (modifiers first on press, reverse order on release). Keys are reference counted, so
+    two held bindings that share a key (both using 'shift', say) only release it when the
+    last of them is released.
+    """
+    def __init__(self, keyboard, mouse, log=print, key_map=None):
+        self.keyboard = keyboard
+        self.mouse = mouse
+        self.log = log
+        self.key_map = KEY_MAP if key_map is None else key_map
+        self.compiled = {}
+        self.target_ids = {}
+        self.refcounts = []  # indexed by target id
+        self.events_submitted = 0
+        self.events_shared = 0
+
+    def compile(self, actions):
+        targets = []
+        for action in actions.split(','):
+            action = action.strip()
+            if action in MOUSE_BUTTONS:
+                target = (self.mouse, MOUSE_BUTTONS[action])
+            elif action.startswith('mouse_'):
+                continue  # mouse_move_* is driven by the axes, not by key presses
+            else:
+                key = self.key_map.get(action, action if len(action) == 1 else None)
+                if not key: continue
+                target = (self.keyboard, key)
+            if target not in targets:
+                targets.append(target)
+        targets.sort(key=lambda t: t[1] not in MODIFIER_KEYS)
+        ops = []
+        for target in targets:
+            if target not in self.target_ids:
+                self.target_ids[target] = len(self.refcounts)
+                self.refcounts.append(0)
+            ops.append((self.target_ids[target], target[0], target[1]))
+        compiled = self.compiled[actions] = (
+            tuple((tid, device.press, key) for tid, device, key in ops),
+            tuple((tid, device.release, key) for tid, device, key in reversed(ops)),
+        )
+        return compiled
+
+    def execute(self, actions, pressed):
+        if not actions: return
+        press, release = self.compiled.get(actions) or self.compile(actions)
+        refcounts = self.refcounts
+        batch = []
+        if pressed:
+            for tid, submit, key in press:
+                count = refcounts[tid]
+                refcounts[tid] = count + 1
+                if count: self.events_shared += 1
+                else: batch.append((submit, key))
+        else:
+            for tid, submit, key in release:
+                count = refcounts[tid]
+                if not count: continue  # not held by any binding
+                refcounts[tid] = count - 1
+                if count > 1: self.events_shared += 1
+                else: batch.append((submit, key))
+        if not batch: return
+        try:
+            for submit, key in batch:
+                submit(key)
+        except Exception as e:
+            self.log(f"Error executing action '{actions}': {e}")
+        self.events_submitted += len(batch)
+
 class ControllerMapper:
-    def __init__(self):
+    def __init__(self, receive_port=None, input_backend='pygame', allowed_hosts=None):
         # --- Pathing Setup ---
         if getattr(sys, 'frozen', False):
             self.base_path = os.path.dirname(sys.executable)
@@ -58,41 +995,49 @@ class ControllerMapper:
         self.joystick = None
         self.joystick_info = {}
         self.controller_thread = None
+        self.network_receiver = None
+        self.net_allowed_hosts = allowed_hosts or []
+        self.evdev_backend = EvdevInputBackend() if input_backend == 'evdev' else None
         self.key_capture_mode = False
         self.capturing_for = None
-        self.directional_key_state = {}
         
         self.modes = ['on_foot', 'ground_vehicle', 'flight']
+        self.layers = {}
         self.current_mode = 'on_foot'
+        self.held_actions = {}
+        self.held_table = None
+        self.mode_binding_table = {}
 
         self.settings = self._get_default_settings()
         self.mappings = self._get_default_mappings()
-        self.presets = {}
+        self.layer_stack = LayerStack(self.mappings, self.current_mode)
+        self.preset_catalog = PresetCatalog(self.presets_path, os.path.join(self.base_path, 'preset_index.json'))
+        self.preset_results = []
 
         self.controller_state = {'buttons': {}, 'axes': {}, 'hats': {}}
-        self.prev_state = {'buttons': {}, 'axes': {}}
-
-        self.key_map = {
-            'space': Key.space, 'enter': Key.enter, 'escape': Key.esc, 'tab': Key.tab, 
-            'shift': Key.shift, 'ctrl': Key.ctrl, 'alt': Key.alt, 'backspace': Key.backspace,
-            'delete': Key.delete, 'up': Key.up, 'down': Key.down, 'left': Key.left, 'right': Key.right,
-            'f1': Key.f1, 'f2': Key.f2, 'f3': Key.f3, 'f4': Key.f4, 'f5': Key.f5, 'f6': Key.f6,
-            'f7': Key.f7, 'f8': Key.f8, 'f9': Key.f9, 'f10': Key.f10, 'f11': Key.f11, 'f12': Key.f12
-        }
+        self.conditioner = InputConditioner(self.settings['global'])
+
+        self.key_actions = KeyActionExecutor(self.keyboard, self.mouse, self.log)
         
         self._scan_for_presets()
         self.setup_gui()
         self.load_profile()
+        self.preset_catalog.refresh_async(self._on_presets_refreshed)
+        if receive_port is not None:
+            self.start_network_receiver(receive_port)
         self.start_controller_thread()
 
     def _get_default_settings(self):
         return {
             'profile_name': 'Default',
+            'modes': ['on_foot', 'ground_vehicle', 'flight'],
+            'layers': {},  # name -> {'type': 'momentary' | 'toggle', 'binding': 'button_N'}
             'mode_bindings': {'cycle': '', 'on_foot': '', 'ground_vehicle': '', 'flight': ''},
             'on_foot': {'mouse_sensitivity': 5.0, 'mouse_acceleration': False, 'invert_axes': {}},
             'ground_vehicle': {'mouse_sensitivity': 8.0, 'mouse_acceleration': False, 'invert_axes': {}},
             'flight': {'mouse_sensitivity': 12.0, 'mouse_acceleration': True, 'invert_axes': {}},
-            'global': {'deadzone': 0.15, 'axis_to_button_threshold': 0.75}
+            'global': {'deadzone': 0.15, 'axis_to_button_threshold': 0.75,
+                       'axis_epsilon': 0.01, 'axis_epsilon_overrides': {}, 'axis_hysteresis': 0.1, 'button_debounce_ms': 10.0}
         }
 
     def _get_default_mappings(self):
@@ -105,23 +1050,59 @@ class ControllerMapper:
             base[f'hat_{i}_down'] = ""
             base[f'hat_{i}_left'] = ""
             base[f'hat_{i}_right'] = ""
-        return {mode: base.copy() for mode in self.modes}
+        return {mode: base.copy() for mode in self._mapping_sets()}
+
+    def _mapping_sets(self):
+        """Names of every mapping table: the modes followed by the layers."""
+        return self.modes + list(self.layers)
+
+    def _mapping_title(self, name):
+        if name in self.layers:
+            kind = 'hold' if self.layers[name].get('type', 'momentary') == 'momentary' else 'toggle'
+            return f"Layer: {name.replace('_', ' ').title()} ({kind})"
+        return name.replace('_', ' ').title()
 
     def _scan_for_presets(self):
         if not os.path.exists(self.presets_path):
             os.makedirs(self.presets_path)
             print(f"Created '{self.presets_path}' directory.")
-        
-        for filename in os.listdir(self.presets_path):
-            if filename.endswith('.json'):
-                preset_name = os.path.splitext(filename)[0]
-                self.presets[preset_name] = os.path.join(self.presets_path, filename)
+        # Only the cached index is read here; the folder itself is rescanned in the background
+        self.preset_catalog.load_cache()
+
+    def _on_presets_refreshed(self, changed, removed):
+        if changed or removed:
+            self.log(f"Preset index updated: {changed} new/changed, {removed} removed")
+        self.ui_call('preset_list', self._filter_presets)
+
+    def _rescan_presets(self):
+        self.log("Rescanning presets...")
+        self.preset_catalog.refresh_async(self._on_presets_refreshed)
+
+    def _filter_presets(self, *args):
+        self.preset_results = self.preset_catalog.search(self.preset_search_var.get(), limit=200)
+        self.preset_list.delete(0, tk.END)
+        for meta in self.preset_results:
+            label = meta['name'] if not meta['device'] else f"{meta['game']}  [{meta['device']}]"
+            if meta.get('invalid'):
+                self.preset_list.insert(tk.END, f"{label}  (unreadable)")
+                self.preset_list.itemconfig(tk.END, foreground='grey')
+            else:
+                self.preset_list.insert(tk.END, label)
+        if self.preset_results:
+            self.preset_list.selection_set(0)
 
     def setup_gui(self):
         self.root = tk.Tk()
         self.root.title("Uni-Mapper v7.0")
         self.root.geometry("1200x900")
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # --- Cross-thread GUI updates all go through the bridge ---
+        self.ui_bridge = UIBridge(self.root)
+        self.ui_bridge.register('log', self._append_log_lines, policy='batch')
+        self.ui_bridge.register('visualization', self.update_visualization)
+        self.ui_bridge.register('rebuild_ui', lambda _: self.rebuild_mapping_ui())
+        self.ui_bridge.register('call', lambda fn: fn())
         
         header_frame = ttk.Frame(self.root)
         header_frame.pack(pady=10)
@@ -146,18 +1127,24 @@ class ControllerMapper:
             if not is_admin():
                 admin_label.bind("<Button-1>", self.run_as_admin)
 
+        self.ui_bridge.start()
+
+    def ui_call(self, key, fn):
+        """Run fn on the Tk thread; only the latest call per key survives a tick."""
+        self.ui_bridge.post('call', fn, key=key)
+
     def setup_mapping_tab(self):
         self.mapping_frame = ttk.Frame(self.main_notebook)
         self.main_notebook.add(self.mapping_frame, text="Mappings & Profiles")
         
         self.mode_notebook = ttk.Notebook(self.mapping_frame)
         self.mode_notebook.pack(side='left', fill='both', expand=True, padx=5, pady=5)
-        self.mapping_widgets = {mode: {} for mode in self.modes}
+        self.mapping_widgets = {mode: {} for mode in self._mapping_sets()}
 
         # Placeholder until a controller is detected
-        for mode, title in [('on_foot', 'On Foot'), ('ground_vehicle', 'Ground Vehicle'), ('flight', 'Flight')]:
+        for mode in self.modes:
             tab_frame = ttk.Frame(self.mode_notebook)
-            self.mode_notebook.add(tab_frame, text=title)
+            self.mode_notebook.add(tab_frame, text=self._mapping_title(mode))
             ttk.Label(tab_frame, text="Connect a controller and press 'Refresh Controllers' in the Status tab.").pack(padx=20, pady=20)
 
         right_pane = ttk.Frame(self.mapping_frame, width=250)
@@ -173,26 +1160,33 @@ class ControllerMapper:
         
         preset_frame = ttk.LabelFrame(right_pane, text="Game Presets", padding=10)
         preset_frame.pack(fill='x', pady=5)
-        self.preset_combo = ttk.Combobox(preset_frame, values=list(self.presets.keys()), state='readonly')
-        self.preset_combo.pack(fill='x', pady=2)
-        if self.presets:
-            self.preset_combo.current(0)
+        ttk.Label(preset_frame, text="Search (game, device...):").pack(anchor='w')
+        self.preset_search_var = tk.StringVar()
+        ttk.Entry(preset_frame, textvariable=self.preset_search_var).pack(fill='x', pady=2)
+        self.preset_list = tk.Listbox(preset_frame, height=8, exportselection=False)
+        self.preset_list.pack(fill='x', pady=2)
+        self.preset_list.bind("<Double-Button-1>", lambda e: self._load_selected_preset())
+        self.preset_search_var.trace('w', self._filter_presets)
+        self._filter_presets()
         ttk.Button(preset_frame, text="Load Selected Preset", command=self._load_selected_preset).pack(fill='x', pady=2)
+        ttk.Button(preset_frame, text="Rescan Presets", command=self._rescan_presets).pack(fill='x', pady=2)
 
         control_frame = ttk.LabelFrame(right_pane, text="Controls", padding=10)
         control_frame.pack(fill='x', pady=5)
         self.enable_var = tk.BooleanVar(value=True)
+        self.mapping_enabled = True
+        self.enable_var.trace('w', lambda *a: setattr(self, 'mapping_enabled', self.enable_var.get()))
         ttk.Checkbutton(control_frame, text="Enable Mapping", variable=self.enable_var).pack(anchor='w')
 
     def rebuild_mapping_ui(self):
         for i in reversed(range(self.mode_notebook.index('end'))):
             self.mode_notebook.forget(i)
         
-        self.mapping_widgets = {mode: {} for mode in self.modes}
+        self.mapping_widgets = {mode: {} for mode in self._mapping_sets()}
 
-        for mode, title in [('on_foot', 'On Foot'), ('ground_vehicle', 'Ground Vehicle'), ('flight', 'Flight')]:
+        for mode in self._mapping_sets():
             tab_frame = ttk.Frame(self.mode_notebook)
-            self.mode_notebook.add(tab_frame, text=title)
+            self.mode_notebook.add(tab_frame, text=self._mapping_title(mode))
             self._create_mode_mapping_ui(tab_frame, mode)
         
         self._update_gui_from_data()
@@ -219,31 +1213,32 @@ class ControllerMapper:
         btn_frame = ttk.LabelFrame(scrollable_frame, text=f"Buttons (0-{num_buttons-1})", padding=10)
         btn_frame.grid(row=0, column=0, sticky='ew', padx=10, pady=5)
         for i in range(num_buttons):
-            self._create_mapping_row(btn_frame, f"{mode}_button_{i}", f"Button {i}", i, self.mappings[mode], self.mapping_widgets[mode])
+            self._create_mapping_row(btn_frame, mode, f"button_{i}", f"Button {i}", i, self.mappings[mode], self.mapping_widgets[mode])
 
         axe_frame = ttk.LabelFrame(scrollable_frame, text=f"Axes (0-{num_axes-1})", padding=10)
         axe_frame.grid(row=1, column=0, sticky='ew', padx=10, pady=5)
         for i in range(num_axes):
-            self._create_mapping_row(axe_frame, f"{mode}_axis_{i}", f"Axis {i}", i, self.mappings[mode], self.mapping_widgets[mode])
+            self._create_mapping_row(axe_frame, mode, f"axis_{i}", f"Axis {i}", i, self.mappings[mode], self.mapping_widgets[mode])
         
         hat_frame = ttk.LabelFrame(scrollable_frame, text=f"POV Hats (0-{num_hats-1})", padding=10)
         hat_frame.grid(row=2, column=0, sticky='ew', padx=10, pady=5)
         for i in range(num_hats):
-             self._create_mapping_row(hat_frame, f"{mode}_hat_{i}_up", f"Hat {i} Up", i*4, self.mappings[mode], self.mapping_widgets[mode])
-             self._create_mapping_row(hat_frame, f"{mode}_hat_{i}_down", f"Hat {i} Down", i*4+1, self.mappings[mode], self.mapping_widgets[mode])
-             self._create_mapping_row(hat_frame, f"{mode}_hat_{i}_left", f"Hat {i} Left", i*4+2, self.mappings[mode], self.mapping_widgets[mode])
-             self._create_mapping_row(hat_frame, f"{mode}_hat_{i}_right", f"Hat {i} Right", i*4+3, self.mappings[mode], self.mapping_widgets[mode])
-
-    def _create_mapping_row(self, parent, widget_key, button_name, row, mapping_dict, widget_dict):
-        ttk.Label(parent, text=f"{button_name}:").grid(row=row, column=0, sticky='w', padx=5, pady=2)
-        var = tk.StringVar(value=mapping_dict.get(button_name, ''))
+             self._create_mapping_row(hat_frame, mode, f"hat_{i}_up", f"Hat {i} Up", i*4, self.mappings[mode], self.mapping_widgets[mode])
+             self._create_mapping_row(hat_frame, mode, f"hat_{i}_down", f"Hat {i} Down", i*4+1, self.mappings[mode], self.mapping_widgets[mode])
+             self._create_mapping_row(hat_frame, mode, f"hat_{i}_left", f"Hat {i} Left", i*4+2, self.mappings[mode], self.mapping_widgets[mode])
+             self._create_mapping_row(hat_frame, mode, f"hat_{i}_right", f"Hat {i} Right", i*4+3, self.mappings[mode], self.mapping_widgets[mode])
+
+    def _create_mapping_row(self, parent, set_name, input_name, label, row, mapping_dict, widget_dict):
+        """One editable binding row. set_name is the mode/layer it belongs to, or None for the mode hotkeys."""
+        ttk.Label(parent, text=f"{label}:").grid(row=row, column=0, sticky='w', padx=5, pady=2)
+        var = tk.StringVar(value=mapping_dict.get(input_name, ''))
         entry = ttk.Entry(parent, textvariable=var, width=30)
         entry.grid(row=row, column=1, padx=5, pady=2)
-        capture_btn = ttk.Button(parent, text="Capture", command=lambda k=widget_key: self.start_key_capture(k))
+        capture_btn = ttk.Button(parent, text="Capture", command=lambda: self.start_key_capture(set_name, input_name))
         capture_btn.grid(row=row, column=2, padx=5, pady=2)
-        clear_btn = ttk.Button(parent, text="Clear", command=lambda k=widget_key: self.clear_mapping(k))
+        clear_btn = ttk.Button(parent, text="Clear", command=lambda: self.clear_mapping(set_name, input_name))
         clear_btn.grid(row=row, column=3, padx=5, pady=2)
-        widget_dict[button_name] = {'var': var, 'entry': entry, 'capture_btn': capture_btn}
+        widget_dict[input_name] = {'var': var, 'entry': entry, 'capture_btn': capture_btn}
 
     def setup_settings_tab(self):
         sf = ttk.Frame(self.main_notebook)
@@ -256,22 +1251,37 @@ class ControllerMapper:
         self.setting_vars = {'global': {}}
         self._create_slider(gf, "Axis Deadzone", 'deadzone', 0.0, 1.0, self.settings['global'], self.setting_vars['global'])
         self._create_slider(gf, "Axis to Button Threshold", 'axis_to_button_threshold', 0.1, 1.0, self.settings['global'], self.setting_vars['global'])
+        self._create_slider(gf, "Axis to Button Hysteresis", 'axis_hysteresis', 0.0, 0.5, self.settings['global'], self.setting_vars['global'])
+        self._create_slider(gf, "Axis Change Epsilon", 'axis_epsilon', 0.0, 0.1, self.settings['global'], self.setting_vars['global'])
+        self._create_slider(gf, "Button Debounce (ms)", 'button_debounce_ms', 0.0, 100.0, self.settings['global'], self.setting_vars['global'])
         
-        mf = ttk.LabelFrame(lp, text="Mode Switching Hotkeys", padding=10)
-        mf.pack(fill='x', pady=5)
-        self.mode_binding_widgets = {}
-        for i, (k, l) in enumerate([('cycle', 'Cycle Modes'), ('on_foot', 'On Foot'), ('ground_vehicle', 'Ground Vehicle'), ('flight', 'Flight')]):
-            self._create_mapping_row(mf, f"mode_{k}", l, i, self.settings['mode_bindings'], self.mode_binding_widgets)
+        self.mode_hotkey_frame = ttk.LabelFrame(lp, text="Mode Switching Hotkeys", padding=10)
+        self.mode_hotkey_frame.pack(fill='x', pady=5)
         
         rp = ttk.Frame(sf)
         rp.pack(side='right', fill='both', expand=True, padx=5)
-        msn = ttk.Notebook(rp)
-        msn.pack(fill='both', expand=True, pady=5)
+        self.mode_settings_notebook = ttk.Notebook(rp)
+        self.mode_settings_notebook.pack(fill='both', expand=True, pady=5)
+        self.rebuild_mode_settings_ui()
+        ttk.Button(rp, text="Apply All Settings", command=self.apply_settings).pack(pady=10)
+
+    def rebuild_mode_settings_ui(self):
+        """(Re)create the hotkey rows and per-mode settings tabs for the current self.modes."""
+        for child in self.mode_hotkey_frame.winfo_children():
+            child.destroy()
+        for tab in self.mode_settings_notebook.tabs():
+            self.mode_settings_notebook.forget(tab)
+        self.setting_vars = {'global': self.setting_vars['global']}
+
+        self.mode_binding_widgets = {}
+        for i, (k, l) in enumerate([('cycle', 'Cycle Modes')] + [(m, self._mapping_title(m)) for m in self.modes]):
+            self._create_mapping_row(self.mode_hotkey_frame, None, k, l, i, self.settings['mode_bindings'], self.mode_binding_widgets)
         
-        for mode, title in [('on_foot', 'On Foot'), ('ground_vehicle', 'Ground Vehicle'), ('flight', 'Flight')]:
+        msn = self.mode_settings_notebook
+        for mode in self.modes:
             self.setting_vars[mode] = {'invert_axes': {}}
             mt = ttk.Frame(msn)
-            msn.add(mt, text=title)
+            msn.add(mt, text=self._mapping_title(mode))
             sens_f = ttk.LabelFrame(mt, text="Sensitivity", padding=10)
             sens_f.pack(fill='x', pady=5)
             self._create_slider(sens_f, 'Mouse Sensitivity', 'mouse_sensitivity', 0.1, 30.0, self.settings[mode], self.setting_vars[mode])
@@ -286,8 +1296,6 @@ class ControllerMapper:
                 var = tk.BooleanVar(value=self.settings[mode]['invert_axes'].get(str(i), False))
                 ttk.Checkbutton(inv_f, text=f"Invert Axis {i}", variable=var).pack(anchor='w', pady=1)
                 self.setting_vars[mode]['invert_axes'][str(i)] = var
-                
-        ttk.Button(rp, text="Apply All Settings", command=self.apply_settings).pack(pady=10)
 
     def _create_slider(self, p, l, k, mn, mx, sd, vd):
         ttk.Label(p, text=l).pack(anchor='w', pady=2)
@@ -340,11 +1348,11 @@ class ControllerMapper:
     def _pip_install_worker(self, package_name, status_label, button):
         try:
             subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-            self.root.after(0, lambda: status_label.config(text="Status: Installed", foreground='green'))
+            self.ui_call((id(status_label), 'status'), lambda: status_label.config(text="Status: Installed", foreground='green'))
             self.log(f"Successfully installed {package_name}.")
         except subprocess.CalledProcessError as e:
-            self.root.after(0, lambda: status_label.config(text="Status: Installation Failed", foreground='red'))
-            self.root.after(0, lambda: button.config(state='normal'))
+            self.ui_call((id(status_label), 'status'), lambda: status_label.config(text="Status: Installation Failed", foreground='red'))
+            self.ui_call((id(button), 'state'), lambda: button.config(state='normal'))
             self.log(f"Failed to install {package_name}. Error: {e}")
 
     def download_and_run_exe(self, url, status_label, button, progress_bar):
@@ -362,7 +1370,7 @@ class ControllerMapper:
             
             with urllib.request.urlopen(url) as response, open(filename, 'wb') as out_file:
                 total_length = int(response.info().get('Content-Length'))
-                progress_bar['maximum'] = total_length
+                self.ui_call((id(progress_bar), 'maximum'), lambda: progress_bar.config(maximum=total_length))
                 
                 chunk_size = 8192
                 bytes_read = 0
@@ -371,21 +1379,22 @@ class ControllerMapper:
                     if not chunk: break
                     out_file.write(chunk)
                     bytes_read += len(chunk)
-                    progress_bar['value'] = bytes_read
-                    self.root.update_idletasks()
+                    self.ui_call((id(progress_bar), 'value'), lambda v=bytes_read: progress_bar.config(value=v))
 
             self.log(f"Downloaded '{os.path.basename(filename)}'.")
-            self.root.after(0, lambda: status_label.config(text="Status: Download Complete. Running installer...", foreground='blue'))
+            self.ui_call((id(status_label), 'status'), lambda: status_label.config(text="Status: Download Complete. Running installer...", foreground='blue'))
             os.startfile(filename)
-            self.root.after(5000, lambda: status_label.config(text="Status: Official driver installer.", foreground='black'))
-            self.root.after(5000, lambda: button.config(state='normal'))
-            self.root.after(5000, lambda: progress_bar.pack_forget())
+            def reset_driver_row():
+                status_label.config(text="Status: Official driver installer.", foreground='black')
+                button.config(state='normal')
+                progress_bar.pack_forget()
+            self.ui_call((id(button), 'reset'), lambda: self.root.after(5000, reset_driver_row))
 
         except Exception as e:
             self.log(f"Failed to download or run driver. Error: {e}")
-            self.root.after(0, lambda: status_label.config(text="Status: Download Failed.", foreground='red'))
-            self.root.after(0, lambda: button.config(state='normal'))
-            self.root.after(0, lambda: progress_bar.pack_forget())
+            self.ui_call((id(status_label), 'status'), lambda: status_label.config(text="Status: Download Failed.", foreground='red'))
+            self.ui_call((id(button), 'state'), lambda: button.config(state='normal'))
+            self.ui_call((id(progress_bar), 'visible'), lambda: progress_bar.pack_forget())
 
     def setup_visualization_tab(self):
         vf = ttk.Frame(self.main_notebook)
@@ -401,6 +1410,19 @@ class ControllerMapper:
         self.controller_info=tk.Text(cf,height=6, width=80)
         self.controller_info.pack(fill='both',expand=True,padx=5,pady=5)
         ttk.Button(cf, text="Refresh Controllers", command=self.refresh_controllers).pack(pady=5)
+
+        nf=ttk.LabelFrame(sf,text="Network Input (remote controller)", padding=10)
+        nf.pack(fill='x',padx=10,pady=5)
+        ttk.Label(nf,text="UDP Port:").pack(side='left',padx=5)
+        self.net_port_var=tk.StringVar(value=str(NET_DEFAULT_PORT))
+        ttk.Entry(nf,textvariable=self.net_port_var,width=8).pack(side='left',padx=5)
+        ttk.Label(nf,text="Allowed hosts:").pack(side='left',padx=5)
+        self.net_allow_var=tk.StringVar(value=', '.join(self.net_allowed_hosts))
+        ttk.Entry(nf,textvariable=self.net_allow_var,width=20).pack(side='left',padx=5)
+        self.net_button=ttk.Button(nf,text="Start Receiver",command=self.toggle_network_receiver)
+        self.net_button.pack(side='left',padx=5)
+        self.net_stats_label=ttk.Label(nf,text="Receiver stopped.")
+        self.net_stats_label.pack(side='left',padx=10)
         
         lf=ttk.LabelFrame(sf,text="Activity Log", padding=10)
         lf.pack(fill='both',expand=True,padx=10,pady=5)
@@ -410,6 +1432,48 @@ class ControllerMapper:
         ls.pack(side='right',fill='y')
         self.log_text.config(yscrollcommand=ls.set)
     
+    def toggle_network_receiver(self):
+        if self.network_receiver:
+            self.stop_network_receiver()
+            return
+        try:
+            port = int(self.net_port_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid port number")
+            return
+        self.net_allowed_hosts = [h.strip() for h in self.net_allow_var.get().split(',') if h.strip()]
+        self.start_network_receiver(port)
+
+    def start_network_receiver(self, port):
+        receiver = NetworkInputReceiver(port, allowed_hosts=self.net_allowed_hosts)
+        try:
+            receiver.start()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to start network receiver: {e}")
+            return
+        self.network_receiver = receiver
+        self.net_port_var.set(str(port))
+        self.net_button.config(text="Stop Receiver")
+        allowed = ', '.join(self.net_allowed_hosts) or 'any host'
+        self.log(f"Listening for network input on UDP port {port} (allowed: {allowed})")
+        self._update_network_stats()
+
+    def stop_network_receiver(self):
+        receiver, self.network_receiver = self.network_receiver, None
+        if receiver: receiver.stop()
+        self.net_button.config(text="Start Receiver")
+        self.net_stats_label.config(text="Receiver stopped.")
+        self.log("Stopped network receiver")
+
+    def _update_network_stats(self):
+        receiver = self.network_receiver
+        if not receiver or not self.running: return
+        st = receiver.stats()
+        state = "connected" if receiver.connected else "waiting for sender"
+        self.net_stats_label.config(text=(f"{state} | {st['rate_hz']:.0f} pkt/s | delay over fastest packet: avg {st['latency_ms_avg']:.1f} ms, "
+                                          f"p95 {st['latency_ms_p95']:.1f} ms, max {st['latency_ms_max']:.1f} ms, jitter {st['jitter_ms']:.1f} ms | clock offset {st['clock_offset_ms']:.1f} ms | lost {st['lost']} ({st['loss_pct']:.1f}%) | rejected {st['rejected']}"))
+        self.root.after(500, self._update_network_stats)
+
     def refresh_controllers(self):
         self.log("Refreshing controller list...")
         pygame.joystick.quit()
@@ -417,27 +1481,31 @@ class ControllerMapper:
         pygame.joystick.init()
         self.joystick = None
 
-    def start_key_capture(self, wk):
+    def _binding_target(self, set_name):
+        """The (mappings, widgets) dicts of a mode/layer, or of the mode hotkeys when set_name is None."""
+        if set_name is None:
+            return self.settings['mode_bindings'], self.mode_binding_widgets
+        return self.mappings[set_name], self.mapping_widgets[set_name]
+
+    def start_key_capture(self, set_name, btn_key):
+        wk = (set_name, btn_key)
         self.capturing_for = wk
         self.key_capture_mode = True
         
-        parts = wk.split('_')
-        mode, btn_key = parts[0], '_'.join(parts[1:])
-        
-        widgets = self.mode_binding_widgets if mode == 'mode' else self.mapping_widgets[mode]
+        _, widgets = self._binding_target(set_name)
         widgets[btn_key]['capture_btn'].config(text="Press key...", state='disabled')
-        self.log(f"Capturing for {btn_key} in mode {mode}...")
+        self.log(f"Capturing for {btn_key} in {set_name or 'mode hotkeys'}...")
 
         def on_press(key):
             if self.key_capture_mode and self.capturing_for == wk:
                 key_name = key.char if hasattr(key, 'char') and key.char else str(key).replace('Key.', '')
-                self.update_mapping(wk, key_name)
+                self.ui_call(('capture', wk), lambda: self.update_mapping(set_name, btn_key, key_name))
                 return False
         
         def on_click(x, y, b, p):
             if p and self.key_capture_mode and self.capturing_for == wk:
                 key_name = {Button.left: 'mouse_left', Button.right: 'mouse_right', Button.middle: 'mouse_middle'}.get(b)
-                if key_name: self.update_mapping(wk, key_name)
+                if key_name: self.ui_call(('capture', wk), lambda: self.update_mapping(set_name, btn_key, key_name))
                 return False
 
         self.key_listener = KeyboardListener(on_press=on_press)
@@ -446,18 +1514,13 @@ class ControllerMapper:
         self.mouse_listener.start()
         self.root.after(10000, lambda: self.stop_key_capture() if self.key_capture_mode else None)
 
-    def update_mapping(self, wk, kn):
-        parts = wk.split('_')
-        mode, btn_key = parts[0], '_'.join(parts[1:])
+    def update_mapping(self, set_name, btn_key, kn):
+        mapping, widgets = self._binding_target(set_name)
+        mapping[btn_key] = kn
+        widgets[btn_key]['var'].set(kn)
+        self._configure_layers()
         
-        if mode == 'mode':
-            self.settings['mode_bindings'][btn_key] = kn
-            self.mode_binding_widgets[btn_key]['var'].set(kn)
-        else:
-            self.mappings[mode][btn_key] = kn
-            self.mapping_widgets[mode][btn_key]['var'].set(kn)
-        
-        self.log(f"Mapped {btn_key} to {kn} for mode {mode}")
+        self.log(f"Mapped {btn_key} to {kn} for {set_name or 'mode hotkeys'}")
         self.stop_key_capture()
 
     def stop_key_capture(self):
@@ -465,30 +1528,27 @@ class ControllerMapper:
         if hasattr(self, 'mouse_listener'): self.mouse_listener.stop()
         self.key_capture_mode = False
         if self.capturing_for:
-            parts = self.capturing_for.split('_')
-            mode, btn_key = parts[0], '_'.join(parts[1:])
-            widgets = self.mode_binding_widgets if mode == 'mode' else self.mapping_widgets[mode]
+            set_name, btn_key = self.capturing_for
+            # The set may be gone if a profile load rebuilt the tabs mid-capture
+            widgets = self.mode_binding_widgets if set_name is None else self.mapping_widgets.get(set_name, {})
             if btn_key in widgets:
                 widgets[btn_key]['capture_btn'].config(text="Capture", state='normal')
             self.capturing_for = None
     
-    def clear_mapping(self, wk):
-        parts = wk.split('_')
-        mode, btn_key = parts[0], '_'.join(parts[1:])
-        
-        if mode == 'mode':
-            self.settings['mode_bindings'][btn_key] = ''
-            self.mode_binding_widgets[btn_key]['var'].set('')
-        else:
-            self.mappings[mode][btn_key] = ''
-            self.mapping_widgets[mode][btn_key]['var'].set('')
-        self.log(f"Cleared mapping for {btn_key} in mode {mode}")
+    def clear_mapping(self, set_name, btn_key):
+        mapping, widgets = self._binding_target(set_name)
+        mapping[btn_key] = ''
+        widgets[btn_key]['var'].set('')
+        self._configure_layers()
+        self.log(f"Cleared mapping for {btn_key} in {set_name or 'mode hotkeys'}")
 
     def apply_settings(self):
         for k, v in self.setting_vars['global'].items():
             self.settings['global'][k] = v.get()
+        self._configure_conditioner()
         
         for mode in self.modes:
+            if mode not in self.setting_vars: continue
             self.settings[mode]['mouse_sensitivity'] = self.setting_vars[mode]['mouse_sensitivity'].get()
             self.settings[mode]['mouse_acceleration'] = self.setting_vars[mode]['mouse_acceleration'].get()
             for i, v in self.setting_vars[mode]['invert_axes'].items():
@@ -505,12 +1565,13 @@ class ControllerMapper:
         
         self.settings['profile_name'] = profile_name
         
-        for mode in self.modes:
-            for bn, wd in self.mapping_widgets[mode].items():
+        for mode in self._mapping_sets():
+            for bn, wd in self.mapping_widgets.get(mode, {}).items():
                 self.mappings[mode][bn] = wd['var'].get()
         
         for bn, wd in self.mode_binding_widgets.items():
             self.settings['mode_bindings'][bn] = wd['var'].get()
+        self._configure_layers()
         
         try:
             os.makedirs(self.profiles_path, exist_ok=True)
@@ -529,11 +1590,13 @@ class ControllerMapper:
             self.load_profile(filename)
 
     def _load_selected_preset(self):
-        preset_name = self.preset_combo.get()
-        if not preset_name:
+        selection = self.preset_list.curselection()
+        if not selection:
             messagebox.showwarning("Warning", "No preset selected.")
             return
-        self.load_profile(self.presets[preset_name], is_preset=True)
+        path = self.preset_results[selection[0]]['path']
+        if self.load_profile(path, is_preset=True):
+            self.preset_catalog.mark_used(path)
 
     def load_profile(self, filename=None, is_preset=False):
         if filename is None:
@@ -542,7 +1605,12 @@ class ControllerMapper:
                     filename = f.read().strip()
             if not filename or not os.path.exists(filename):
                 self.settings = self._get_default_settings()
+                self._configure_modes()
                 self.mappings = self._get_default_mappings()
+                self._configure_layers()
+                self._configure_conditioner()
+                self.rebuild_mode_settings_ui()
+                self.ui_bridge.post('rebuild_ui')
                 self._update_gui_from_data()
                 return
         
@@ -555,19 +1623,25 @@ class ControllerMapper:
         try:
             with open(filename, 'r') as f: data = json.load(f)
             self.settings = self._merge_dicts(self._get_default_settings(), data.get('settings', {}))
+            self._configure_modes()
             self.mappings = self._merge_dicts(self._get_default_mappings(), data.get('mappings', {}))
+            self._configure_layers()
+            self._configure_conditioner()
+            self.rebuild_mode_settings_ui()
+            self.ui_bridge.post('rebuild_ui')
             self._update_gui_from_data()
             if not is_preset:
                 with open(self.last_profile_file, 'w') as f: f.write(filename)
             msg_type = "Preset" if is_preset else "Profile"
             self.log(f"Loaded {msg_type}: {self.settings['profile_name']}")
             messagebox.showinfo("Success", f"{msg_type} '{self.settings['profile_name']}' loaded!")
+            return True
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file: {e}")
 
     def _update_gui_from_data(self):
         self.profile_var.set(self.settings.get('profile_name', 'Default'))
-        for mode in self.modes:
+        for mode in self._mapping_sets():
             for bn, m in self.mappings[mode].items():
                 if bn in self.mapping_widgets.get(mode, {}):
                     self.mapping_widgets[mode][bn]['var'].set(m)
@@ -586,6 +1660,31 @@ class ControllerMapper:
                 for i, v_var in self.setting_vars[mode]['invert_axes'].items():
                     v_var.set(self.settings[mode]['invert_axes'].get(i, False))
                     
+    def _configure_modes(self):
+        """Take the mode and layer definitions from the freshly loaded settings."""
+        self.modes = list(self.settings.get('modes') or ['on_foot'])
+        self.layers = {name: spec for name, spec in self.settings.get('layers', {}).items() if name not in self.modes}
+        for mode in self.modes:
+            self.settings.setdefault(mode, {'mouse_sensitivity': 5.0, 'mouse_acceleration': False, 'invert_axes': {}})
+        if self.current_mode not in self.modes:
+            self.current_mode = self.modes[0]
+
+    def _configure_layers(self):
+        """Rebuild the merged mapping table and the button -> mode/layer switch lookup."""
+        table = {}
+        for mode, binding in self.settings['mode_bindings'].items():
+            if binding and (mode == 'cycle' or mode in self.modes):
+                table[binding] = ('cycle', None) if mode == 'cycle' else ('mode', mode)
+        for name, spec in self.layers.items():
+            if spec.get('binding'):
+                table[spec['binding']] = (spec.get('type', 'momentary'), name)
+        self.mode_binding_table = table
+        self.layer_stack.set_mappings(self.mappings, self.current_mode)
+
+    def _configure_conditioner(self):
+        self.conditioner.configure(self.settings['global'])
+        self.conditioner.reset()
+
     def _merge_dicts(self, d, u):
         for k, v in u.items():
             if isinstance(v, dict) and k in d and isinstance(d[k], dict):
@@ -596,6 +1695,9 @@ class ControllerMapper:
 
     def on_closing(self):
         self.running = False
+        self.ui_bridge.stop()
+        if self.network_receiver: self.network_receiver.stop()
+        if self.evdev_backend: self.evdev_backend.close()
         self.stop_key_capture()
         self.save_profile()
         if self.controller_thread and self.controller_thread.is_alive():
@@ -609,36 +1711,63 @@ class ControllerMapper:
     def controller_loop(self):
         while self.running:
             try:
-                pygame.event.pump()
-                if not self.joystick and pygame.joystick.get_count() > 0:
-                    self.joystick = pygame.joystick.Joystick(0)
-                    self.joystick.init()
-                    self.joystick_info = {
-                        'name': self.joystick.get_name(),
-                        'buttons': self.joystick.get_numbuttons(),
-                        'axes': self.joystick.get_numaxes(),
-                        'hats': self.joystick.get_numhats()
-                    }
-                    self.log(f"Connected: {self.joystick_info['name']}")
-                    self.root.after(0, self.rebuild_mapping_ui)
-                elif pygame.joystick.get_count() == 0 and self.joystick:
-                    self.log(f"Disconnected: {self.joystick_info['name']}")
-                    self.joystick = None
+                device = self._poll_input_device()
+                if device is not self.joystick:
+                    if self.joystick:
+                        self.release_all_inputs()
+                        self.log(f"Disconnected: {self.joystick_info['name']}")
+                    self.joystick = device
                     self.joystick_info = {}
-                    self.root.after(0, self.rebuild_mapping_ui)
+                    if device:
+                        device.init()
+                        self.joystick_info = {
+                            'name': device.get_name(),
+                            'buttons': device.get_numbuttons(),
+                            'axes': device.get_numaxes(),
+                            'hats': device.get_numhats()
+                        }
+                        self.log(f"Connected: {self.joystick_info['name']}")
+                    self.ui_bridge.post('rebuild_ui')
 
                 if self.joystick:
                     self.update_controller_state()
-                    if self.enable_var.get():
+                    if self.mapping_enabled:
                         self.process_controller_input()
-                    self.root.after(0, self.update_visualization)
+                    self.ui_bridge.post('visualization', {
+                        'axes': dict(self.controller_state['axes']),
+                        'num_axes': self.joystick_info.get('axes', 0),
+                        'mode': self.layer_stack.describe(),
+                        'suppressed': self.conditioner.suppressed(),
+                        'latency_ms': self._input_latency_ms(),
+                    })
                 
                 time.sleep(0.01)
             except Exception as e:
                 self.log(f"Controller loop error: {e}")
+                try: self.release_all_inputs()
+                except Exception: pass
                 self.joystick = None
                 time.sleep(1)
 
+    def _poll_input_device(self):
+        receiver = self.network_receiver
+        if receiver:
+            return receiver.device if receiver.connected else None
+        if self.evdev_backend:
+            self.evdev_backend.poll(0)
+            return self.evdev_backend.device
+        pygame.event.pump()
+        if pygame.joystick.get_count() == 0:
+            return None
+        if self.joystick and not isinstance(self.joystick, VirtualJoystick):
+            return self.joystick
+        return pygame.joystick.Joystick(0)
+
+    def _input_latency_ms(self):
+        """Average kernel-timestamp to read latency, for backends that report event timestamps."""
+        latencies = getattr(self.joystick, 'latencies', None)
+        return sum(latencies) / len(latencies) if latencies else None
+
     def update_controller_state(self):
         if not self.joystick: return
         for i in range(self.joystick_info.get('buttons',0)): self.controller_state['buttons'][i] = self.joystick.get_button(i)
@@ -647,18 +1776,17 @@ class ControllerMapper:
 
     def process_controller_input(self):
         if not self.joystick: return
-        if self.process_mode_switches(): return
-        self.process_buttons()
+        button_edges = self.conditioner.button_edges(self.controller_state['buttons'], self.joystick_info.get('buttons', 0), time.monotonic())
+        button_edges = self.process_mode_switches(button_edges)
+        if self.layer_stack.table is not self.held_table:
+            self.release_remapped_inputs()
+        self.process_buttons(button_edges)
         self.process_axes()
         self.process_hats()
     
-    def process_buttons(self):
-        for i in range(self.joystick_info.get('buttons', 0)):
-            pressed = self.controller_state['buttons'].get(i, 0)
-            was_pressed = self.prev_state['buttons'].get(i, 0)
-            if pressed != was_pressed:
-                self.execute_key_action(self.mappings[self.current_mode].get(f'button_{i}'), pressed)
-            self.prev_state['buttons'][i] = pressed
+    def process_buttons(self, button_edges):
+        for i, pressed in button_edges:
+            self.set_input_active(f'button_{i}', pressed)
     
     def process_axes(self):
         gs = self.settings['global']
@@ -666,30 +1794,27 @@ class ControllerMapper:
         mouse_dx, mouse_dy = 0, 0
 
         for i in range(self.joystick_info.get('axes', 0)):
-            axis_val = self.controller_state['axes'].get(i, 0.0)
+            changed, axis_val = self.conditioner.update_axis(i, self.controller_state['axes'].get(i, 0.0))
+            action = self.layer_stack.table.get(f'axis_{i}')
+            # Mouse axes keep moving while the stick is held; everything else only reacts to changes
+            if not changed and action not in ('mouse_x_axis', 'mouse_y_axis'):
+                continue
+
             if ms['invert_axes'].get(str(i), False):
                 axis_val = -axis_val
-            
-            action = self.mappings[self.current_mode].get(f'axis_{i}')
 
             if action == 'mouse_x_axis':
                 if abs(axis_val) > gs['deadzone']: mouse_dx += axis_val
             elif action == 'mouse_y_axis':
                 if abs(axis_val) > gs['deadzone']: mouse_dy += axis_val
             elif action == 'throttle_fwd':
-                 self.update_directional_key_state('w', axis_val < -gs['deadzone']) # W for forward throttle
-                 self.update_directional_key_state('s', False)
+                self.set_input_active(f'axis_{i}', axis_val < -gs['deadzone'])
             elif action == 'throttle_rev':
-                 self.update_directional_key_state('s', axis_val > gs['deadzone']) # S for reverse throttle
-                 self.update_directional_key_state('w', False)
+                self.set_input_active(f'axis_{i}', axis_val > gs['deadzone'])
             else:
-                threshold = gs['axis_to_button_threshold']
-                pressed = axis_val > threshold
-                was_pressed = self.prev_state.get('axes', {}).get(i, 0.0) > threshold
-                if pressed != was_pressed:
-                    self.execute_key_action(action, pressed)
-            
-            self.prev_state.setdefault('axes', {})[i] = axis_val
+                # Applied on every change, not just on crossings: after a reset a held axis
+                # presses whatever the new mode or layer maps it to, like hats do
+                self.set_input_active(f'axis_{i}', self.conditioner.axis_button(i, axis_val, gs['axis_to_button_threshold']))
         
         if mouse_dx != 0 or mouse_dy != 0:
             sens = ms['mouse_sensitivity']
@@ -703,21 +1828,39 @@ class ControllerMapper:
     def process_hats(self):
         for i in range(self.joystick_info.get('hats', 0)):
             hat_val = self.controller_state['hats'].get(i, (0, 0))
-            self.update_directional_key_state(f'hat_{i}_up', hat_val[1] == 1)
-            self.update_directional_key_state(f'hat_{i}_down', hat_val[1] == -1)
-            self.update_directional_key_state(f'hat_{i}_left', hat_val[0] == -1)
-            self.update_directional_key_state(f'hat_{i}_right', hat_val[0] == 1)
-        
-    def process_mode_switches(self):
-        for i in range(self.joystick_info.get('buttons', 0)):
-            if self.controller_state['buttons'].get(i, 0) and not self.prev_state['buttons'].get(i, 0):
-                button_name = f'button_{i}'
-                for mode, bound_key in self.settings['mode_bindings'].items():
-                    if button_name == bound_key:
-                        if mode == 'cycle': self.cycle_mode()
-                        else: self.switch_mode(mode)
-                        return True
-        return False
+            if not self.conditioner.update_hat(i, hat_val): continue
+            self.set_input_active(f'hat_{i}_up', hat_val[1] == 1)
+            self.set_input_active(f'hat_{i}_down', hat_val[1] == -1)
+            self.set_input_active(f'hat_{i}_left', hat_val[0] == -1)
+            self.set_input_active(f'hat_{i}_right', hat_val[0] == 1)
+        
+    def process_mode_switches(self, button_edges):
+        """Apply mode and layer switches, returning the edges that still need mapping."""
+        remaining = []
+        for i, pressed in button_edges:
+            binding = self.mode_binding_table.get(f'button_{i}')
+            if not binding:
+                remaining.append((i, pressed))
+                continue
+            if not pressed:
+                self.set_input_active(f'button_{i}', False)  # pressed before it became a switch binding
+            kind, target = binding
+            if kind == 'momentary':
+                changed = self.layer_stack.push(target) if pressed else self.layer_stack.pop(target)
+            elif not pressed:
+                continue
+            elif kind == 'toggle':
+                changed = self.layer_stack.toggle(target)
+            elif kind == 'cycle':
+                self.cycle_mode()
+                continue
+            else:
+                self.switch_mode(target)
+                continue
+            if changed:
+                self.conditioner.reset()
+                self.log(f"Active layers: {self.layer_stack.describe()}")
+        return remaining
     
     def cycle_mode(self):
         current_index = self.modes.index(self.current_mode)
@@ -727,49 +1870,66 @@ class ControllerMapper:
     def switch_mode(self, new_mode):
         if new_mode in self.modes:
             self.current_mode = new_mode
+            self.layer_stack.set_base(new_mode)
+            self.conditioner.reset()
             self.log(f"Switched to mode: {new_mode.replace('_', ' ').title()}")
         
-    def update_directional_key_state(self, key_or_action, active):
-        is_action = '_' in key_or_action
-        
-        action = self.mappings[self.current_mode].get(key_or_action) if is_action else key_or_action
-        if not action: return
-            
-        prev_active = self.directional_key_state.get(key_or_action, False)
-        if active != prev_active:
-            self.execute_key_action(action, active)
-        self.directional_key_state[key_or_action] = active
-        
+    def set_input_active(self, input_name, active):
+        """Press or release whatever an input maps to.
+
+        The action is resolved once on press and remembered, so a key held through a
+        mode or layer change is released as the key it was pressed as. Throttle axes are
+        held here too, under their axis name, as the key they drive.
+        """
+        if active:
+            action = self.layer_stack.table.get(input_name)
+            if not action or input_name in self.held_actions: return
+            self.held_actions[input_name] = action
+            self.execute_key_action(THROTTLE_KEYS.get(action, action), True)
+        else:
+            action = self.held_actions.pop(input_name, None)
+            if action: self.execute_key_action(THROTTLE_KEYS.get(action, action), False)
+
+    def release_remapped_inputs(self):
+        """After the mode/layer stack changed, release held inputs that no longer map to the same action.
+
+        Their new action may be a throttle or mouse axis that never sends a release, so
+        leaving them to their own release edge could keep the key stuck down.
+        """
+        table = self.layer_stack.table
+        for input_name, action in list(self.held_actions.items()):
+            if table.get(input_name) != action:
+                self.set_input_active(input_name, False)
+        self.held_table = table
+
+    def release_all_inputs(self):
+        """Release every held key, e.g. when the device (or a network sender) vanished with inputs down."""
+        for input_name in list(self.held_actions):
+            self.set_input_active(input_name, False)
+        self.conditioner.reset(device=True)
+
     def execute_key_action(self, actions, pressed):
-        if not actions: return
-        for action in actions.split(','):
-            action = action.strip()
-            try:
-                if action.startswith('mouse_') and not action.startswith('mouse_move_'):
-                    button = {'mouse_left': Button.left, 'mouse_right': Button.right, 'mouse_middle': Button.middle}.get(action)
-                    if button: (self.mouse.press if pressed else self.mouse.release)(button)
-                else:
-                    key = self.key_map.get(action, action if len(action) == 1 else None)
-                    if key: (self.keyboard.press if pressed else self.keyboard.release)(key)
-            except Exception as e:
-                self.log(f"Error executing action '{action}': {e}")
+        self.key_actions.execute(actions, pressed)
 
-    def update_visualization(self):
+    def update_visualization(self, snapshot):
         if not hasattr(self, 'canvas'): return
         self.canvas.delete("all")
-        if not self.joystick_info: return
+        if not snapshot: return
         
         cols = 4
         width = 800 / cols
         height = 60
         
-        for i in range(self.joystick_info.get('axes', 0)):
+        for i in range(snapshot['num_axes']):
             row, col = divmod(i, cols)
             x, y = col * width, row * height
-            axis_val = self.controller_state['axes'].get(i, 0.0)
+            axis_val = snapshot['axes'].get(i, 0.0)
             self._draw_axis(x + 10, y + 10, width - 20, height - 20, f"Axis {i}", axis_val)
 
-        self.canvas.create_text(400, 580, text=f"Current Mode: {self.current_mode.replace('_', ' ').title()}", fill="white", font=("Helvetica", 12, "bold"))
+        self.canvas.create_text(400, 555, text=f"Events suppressed by input filter: {snapshot['suppressed']}", fill="grey", font=("Helvetica", 10))
+        if snapshot['latency_ms'] is not None:
+            self.canvas.create_text(400, 535, text=f"Input latency (kernel event to read): {snapshot['latency_ms']:.2f} ms", fill="grey", font=("Helvetica", 10))
+        self.canvas.create_text(400, 580, text=f"Current Mode: {snapshot['mode']}", fill="white", font=("Helvetica", 12, "bold"))
 
     def _draw_axis(self, x, y, w, h, label, value):
         self.canvas.create_text(x + w / 2, y + h - 5, text=label, fill='white')
@@ -783,11 +1943,15 @@ class ControllerMapper:
 
     def log(self, message):
         log_msg = f"[{time.strftime('%H:%M:%S')}] {message}\n"
-        if hasattr(self, 'log_text'):
-            self.log_text.insert(tk.END, log_msg)
-            self.log_text.see(tk.END)
+        if hasattr(self, 'ui_bridge'):
+            self.ui_bridge.post('log', log_msg)
         print(log_msg.strip())
 
+    def _append_log_lines(self, lines):
+        if not hasattr(self, 'log_text'): return
+        self.log_text.insert(tk.END, ''.join(lines))
+        self.log_text.see(tk.END)
+
     def update_controller_info(self, info):
         self.controller_info.delete(1.0, tk.END)
         self.controller_info.insert(tk.END, info)
@@ -807,9 +1971,82 @@ class ControllerMapper:
         self.log("Uni-Mapper v7.0")
         self.root.mainloop()
 
+class _CountingController:
+    """Input sink for benchmarks: counts events instead of sending them to the OS."""
+    def __init__(self):
+        self.events = 0
+    def press(self, key): self.events += 1
+    def release(self, key): self.events += 1
+
+def run_action_benchmark(profile_path, mode='flight', iterations=20000):
+    """Measure key action throughput for one mode of a profile, without sending real input."""
+    with open(profile_path, 'r') as f: mappings = json.load(f).get('mappings', {}).get(mode, {})
+    actions = [a for a in mappings.values() if isinstance(a, str) and a]
+    chords, kind = [a for a in actions if ',' in a], 'multi-key'
+    if not chords:
+        if not actions:
+            print(f"No key actions in mode '{mode}' of {profile_path}")
+            return
+        print(f"No multi-key actions in mode '{mode}' of {profile_path}; benchmarking its single-key actions instead")
+        chords, kind = actions, 'single-key'
+    keyboard, mouse = _CountingController(), _CountingController()
+    executor = KeyActionExecutor(keyboard, mouse)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        # Hold every chord at once, then let go in reverse, like mashing a chord-heavy flight layout
+        for a in chords: executor.execute(a, True)
+        for a in reversed(chords): executor.execute(a, False)
+    elapsed = time.perf_counter() - start
+    calls = iterations * len(chords) * 2
+    print(f"{len(chords)} {kind} actions in '{mode}', {iterations} iterations")
+    print(f"{calls} press/release calls in {elapsed:.3f}s: {calls / elapsed:,.0f} calls/s, {elapsed / calls * 1e6:.2f} us/call")
+    print(f"{keyboard.events + mouse.events} input events submitted, {executor.events_shared} avoided by shared-key reference counting")
+
+def run_network_sender(target, trace=None, rate_hz=250):
+    """Headless sender mode: stream a local joystick (or a recorded trace) to a remote Uni-Mapper."""
+    host, _, port = target.partition(':')
+    sender = NetworkInputSender(host, int(port) if port else NET_DEFAULT_PORT)
+    if trace:
+        device = TraceJoystick(trace)
+    else:
+        pygame.init()
+        pygame.joystick.init()
+        print("Waiting for a controller...")
+        while pygame.joystick.get_count() == 0:
+            pygame.event.pump()
+            time.sleep(0.5)
+        device = pygame.joystick.Joystick(0)
+        device.init()
+    print(f"Streaming '{device.get_name()}' to {sender.address[0]}:{sender.address[1]} at {rate_hz} Hz (Ctrl+C to stop)")
+    try:
+        sender.run(device, rate_hz)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sender.close()
+        print(f"Sent {sender.packets_sent} packets ({sender.bytes_sent} bytes)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Uni-Mapper: Universal Controller Mapper")
+    parser.add_argument('--receive', nargs='?', type=int, const=NET_DEFAULT_PORT, metavar='PORT', help="Start with the network input receiver listening on PORT")
+    parser.add_argument('--allow', action='append', metavar='HOST', help="With --receive, only accept input from HOST (repeatable; default: any host)")
+    parser.add_argument('--send', metavar='HOST[:PORT]', help="Run headless and stream the local controller to a remote Uni-Mapper")
+    parser.add_argument('--trace', metavar='FILE', help="With --send, replay a recorded JSON trace instead of a controller")
+    parser.add_argument('--rate', type=int, default=250, help="With --send, polling rate in Hz")
+    parser.add_argument('--benchmark-actions', metavar='PROFILE', help="Benchmark multi-key action throughput for a profile's flight mode and exit")
+    parser.add_argument('--input-backend', choices=['pygame', 'evdev'], default='pygame', help="Read controllers through pygame/SDL or directly from /dev/input (Linux)")
+    args = parser.parse_args()
+
+    if args.input_backend == 'evdev' and fcntl is None:
+        parser.error("the evdev input backend is only available on Linux")
+    if args.benchmark_actions:
+        run_action_benchmark(args.benchmark_actions)
+        sys.exit(0)
+    if args.send:
+        run_network_sender(args.send, args.trace, args.rate)
+        sys.exit(0)
     try:
-        app = ControllerMapper()
+        app = ControllerMapper(receive_port=args.receive, input_backend=args.input_backend, allowed_hosts=args.allow)
         app.run()
     except Exception as e:
         messagebox.showerror("Fatal Error", str(e))
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("pynput")
+
+import Uni_Mapper as um
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux', reason="evdev is Linux only")
+
+
+def event(ev_type, code, value, sec=1, usec=0):
+    return um.EVDEV_EVENT.pack(sec, usec, ev_type, code, value)
+
+
+@pytest.fixture
+def pipe_backend():
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    device = um.EvdevJoystick('Pipe Stick', [um.BTN_JOYSTICK, um.BTN_JOYSTICK + 1], {um.ABS_X: (0, 255), um.ABS_HAT0X: (-1, 1), um.ABS_HAT0X + 1: (-1, 1)}, fd=r)
+    backend = um.EvdevInputBackend(pattern='')
+    backend.add_device(device)
+    yield backend, device, w
+    backend.close()
+    os.close(w)
+
+
+def test_split_writes_keep_partial_events(pipe_backend):
+    backend, device, w = pipe_backend
+    frame = (event(um.EV_KEY, um.BTN_JOYSTICK + 1, 1) + event(um.EV_ABS, um.ABS_X, 255)
+             + event(um.EV_ABS, um.ABS_HAT0X + 1, -1) + event(um.EV_SYN, um.SYN_REPORT, 0))
+    cut = um.EVDEV_EVENT.size + 7  # mid-way through the second event
+
+    os.write(w, frame[:cut])
+    assert backend.poll(timeout=1.0) == 1
+    assert device.get_button(1) == 1
+    assert device.get_axis(0) == 0.0  # ABS_X is still in the remainder
+    assert len(device.remainder) == 7
+
+    os.write(w, frame[cut:])
+    assert backend.poll(timeout=1.0) == 3
+    assert device.remainder == b''
+    assert device.get_axis(0) == pytest.approx(1.0)
+    assert device.get_hat(0) == (0, 1)
+    assert device.events_decoded == 4
+    assert device.last_event_time == 1.0
+
+
+def test_byte_at_a_time_writes(pipe_backend):
+    backend, device, w = pipe_backend
+    frame = event(um.EV_KEY, um.BTN_JOYSTICK, 1) + event(um.EV_SYN, um.SYN_REPORT, 0)
+    decoded = 0
+    for i in range(len(frame)):
+        os.write(w, frame[i:i + 1])
+        decoded += backend.poll(timeout=1.0)
+    assert decoded == 2
+    assert device.get_button(0) == 1
+    assert device.remainder == b''
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("pynput")
+
+import Uni_Mapper as um
+
+
+@pytest.fixture
+def conditioner():
+    return um.InputConditioner({'axis_epsilon': 0.05, 'axis_epsilon_overrides': {'1': 0.2},
+                                'axis_hysteresis': 0.1, 'button_debounce_ms': 10.0})
+
+
+def test_sub_epsilon_and_unchanged_axis_samples_are_dropped(conditioner):
+    assert conditioner.update_axis(0, 0.5) == (True, 0.5)
+    assert conditioner.update_axis(0, 0.5) == (False, 0.5)
+    assert conditioner.update_axis(0, 0.52) == (False, 0.5)
+    assert conditioner.update_axis(0, 0.6) == (True, 0.6)
+    assert conditioner.update_axis(0, 0.0) == (True, 0.0)
+    assert conditioner.update_axis(0, 0.0) == (False, 0.0)
+    # Per-axis overrides; returning to exactly 0.0 always gets through
+    assert conditioner.update_axis(1, 0.03) == (True, 0.03)
+    assert conditioner.update_axis(1, 0.15) == (False, 0.03)
+    assert conditioner.update_axis(1, 0.0) == (True, 0.0)
+    assert conditioner.counters['axis_unchanged'] == 2
+    assert conditioner.counters['axis_sub_epsilon'] == 2
+
+
+def test_reset_re_evaluates_axes_and_hats(conditioner):
+    conditioner.update_axis(0, 0.5)
+    assert conditioner.update_hat(0, (1, 0))
+    assert not conditioner.update_hat(0, (1, 0))
+    conditioner.reset()
+    assert conditioner.update_axis(0, 0.5) == (True, 0.5)
+    assert conditioner.update_hat(0, (1, 0))
+
+
+def test_hysteresis_absorbs_chatter_around_the_threshold(conditioner):
+    samples = [0.74, 0.76, 0.74, 0.76, 0.70, 0.66, 0.64, 0.70, 0.76]
+    states = [conditioner.axis_button(0, v, 0.75) for v in samples]
+    assert states == [False, True, True, True, True, True, False, False, True]
+    # Plain-threshold crossings the band held back: 0.76->0.74, 0.74->0.76 and 0.76->0.70
+    assert conditioner.counters['hysteresis_hold'] == 3
+
+
+def test_button_bounce_inside_the_debounce_window_is_held_back(conditioner):
+    assert conditioner.button_edges({0: 1}, 1, now=1.000) == [(0, 1)]
+    assert conditioner.button_edges({0: 0}, 1, now=1.004) == []
+    assert conditioner.button_edges({0: 1}, 1, now=1.006) == []
+    assert conditioner.button_edges({0: 0}, 1, now=1.020) == [(0, 0)]
+    assert conditioner.counters['button_bounce'] == 1
+    assert conditioner.suppressed() == 1
+
+
+def test_device_reset_forgets_buttons(conditioner):
+    conditioner.button_edges({0: 1}, 1, now=1.0)
+    conditioner.axis_button(0, 0.9, 0.75)
+    conditioner.reset(device=True)
+    assert conditioner.button_edges({0: 1}, 1, now=2.0) == [(0, 1)]
+    assert conditioner.axis_button(0, 0.7, 0.75) is False
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("pynput")
+
+import Uni_Mapper as um
+
+
+class RecordingDevice:
+    def __init__(self, log):
+        self.log = log
+    def press(self, key): self.log.append(('press', key))
+    def release(self, key): self.log.append(('release', key))
+
+
+@pytest.fixture
+def executor():
+    log = []
+    executor = um.KeyActionExecutor(RecordingDevice(log), RecordingDevice(log))
+    executor.events = log
+    return executor
+
+
+def test_modifiers_press_first_and_release_in_reverse(executor):
+    executor.execute('w, shift', True)
+    executor.execute('w, shift', False)
+    shift = um.KEY_MAP['shift']
+    assert executor.events == [('press', shift), ('press', 'w'), ('release', 'w'), ('release', shift)]
+
+
+def test_shared_keys_are_reference_counted(executor):
+    shift = um.KEY_MAP['shift']
+    executor.execute('shift,w', True)
+    executor.execute('shift,s', True)
+    assert executor.events == [('press', shift), ('press', 'w'), ('press', 's')]
+    executor.execute('shift,w', False)
+    assert executor.events[3:] == [('release', 'w')]  # shift is still held for shift,s
+    executor.execute('shift,s', False)
+    assert executor.events[4:] == [('release', 's'), ('release', shift)]
+    assert executor.events_shared == 2
+    assert executor.events_submitted == 6
+
+
+def test_release_without_press_and_unknown_names_are_ignored(executor):
+    executor.execute('e', False)
+    executor.execute('', True)
+    executor.execute('mouse_move_up, notakey, mouse_left', True)
+    assert executor.events == [('press', um.Button.left)]
+
+
+def test_submit_errors_are_logged_not_raised():
+    messages = []
+    class Failing:
+        def press(self, key): raise OSError("no input access")
+        release = press
+    executor = um.KeyActionExecutor(Failing(), Failing(), log=messages.append)
+    executor.execute('e', True)
+    assert messages == ["Error executing action 'e': no input access"]
@@ -0,0 +1,118 @@
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("pynput")
+
+import Uni_Mapper as um
+
+
+class RecordingDevice:
+    def __init__(self, log):
+        self.log = log
+    def press(self, key): self.log.append(('press', key))
+    def release(self, key): self.log.append(('release', key))
+
+
+def make_mapper(mappings, layers=None, mode_bindings=None):
+    """A ControllerMapper with just the controller-thread state, no Tk window."""
+    mapper = object.__new__(um.ControllerMapper)
+    mapper.events = []
+    device = RecordingDevice(mapper.events)
+    mapper.log = lambda message: None
+    mapper.key_actions = um.KeyActionExecutor(device, device)
+    mapper.mouse = None
+    mapper.settings = mapper._get_default_settings()
+    mapper.settings['modes'] = [m for m in mappings if m not in (layers or {})]
+    mapper.settings['layers'] = layers or {}
+    mapper.settings['mode_bindings'] = mode_bindings or {}
+    mapper.current_mode = mapper.settings['modes'][0]
+    mapper.mappings = mappings
+    mapper._configure_modes()
+    mapper.layer_stack = um.LayerStack(mappings, mapper.current_mode)
+    mapper.conditioner = um.InputConditioner(mapper.settings['global'])
+    mapper.held_actions, mapper.held_table = {}, None
+    mapper.joystick = True
+    mapper.joystick_info = {'buttons': 4, 'axes': 2, 'hats': 1}
+    mapper.controller_state = {'buttons': {}, 'axes': {}, 'hats': {}}
+    mapper._configure_layers()
+    return mapper
+
+
+def tick(mapper, buttons=None, axes=None, hats=None):
+    state = mapper.controller_state
+    state['buttons'].update(buttons or {})
+    state['axes'].update(axes or {})
+    state['hats'].update(hats or {})
+    mapper.conditioner.button_times.clear()  # every tick is outside the debounce window
+    mapper.process_controller_input()
+
+
+def test_layer_stack_push_pop_toggle():
+    mappings = {'base': {'button_0': 'a', 'button_1': 'b'}, 'alt': {'button_0': 'x', 'button_1': ''}, 'nav': {'button_1': 'n'}}
+    stack = um.LayerStack(mappings, 'base')
+    base_table = stack.table
+    assert base_table == {'button_0': 'a', 'button_1': 'b'}
+
+    assert stack.push('alt')
+    assert not stack.push('alt')
+    assert stack.table is not base_table
+    assert stack.table == {'button_0': 'x', 'button_1': 'b'}  # empty entries fall through
+
+    assert stack.toggle('nav')
+    assert stack.table == {'button_0': 'x', 'button_1': 'n'}
+    assert stack.describe() == 'Base + Alt + Nav'
+    assert stack.pop('alt')
+    assert not stack.pop('alt')
+    assert stack.table == {'button_0': 'a', 'button_1': 'n'}
+    assert stack.toggle('nav')
+    assert stack.active == []
+    assert stack.table == base_table
+
+    stack.push('nav')
+    stack.set_mappings({'base': {}, 'other': {}}, 'other')
+    assert stack.active == [] and stack.table == {}
+
+
+def test_momentary_layer_releases_held_button_as_the_key_it_pressed():
+    mapper = make_mapper({'on_foot': {'button_0': 'e'}, 'shift': {'button_0': 'f'}},
+                         layers={'shift': {'type': 'momentary', 'binding': 'button_3'}})
+    tick(mapper, buttons={0: 1})
+    tick(mapper, buttons={3: 1})
+    assert mapper.events == [('press', 'e'), ('release', 'e')]
+    tick(mapper, buttons={0: 0})
+    tick(mapper, buttons={0: 1})
+    tick(mapper, buttons={3: 0})
+    assert mapper.events[2:] == [('press', 'f'), ('release', 'f')]
+    assert mapper.held_actions == {}
+
+
+def test_mode_switch_releases_held_throttle():
+    mapper = make_mapper({'on_foot': {'axis_1': 'throttle_fwd'}, 'flight': {}}, mode_bindings={'flight': 'button_2'})
+    tick(mapper, axes={1: -0.9})
+    assert mapper.events == [('press', 'w')]
+    tick(mapper, buttons={2: 1})
+    assert mapper.current_mode == 'flight'
+    assert mapper.events == [('press', 'w'), ('release', 'w')]
+    tick(mapper, axes={1: 0.0})
+    assert mapper.events == [('press', 'w'), ('release', 'w')]
+    assert mapper.held_actions == {}
+
+
+def test_toggle_layer_remaps_held_axis_button_and_hat():
+    mapper = make_mapper({'on_foot': {'axis_0': 'q', 'hat_0_up': 'up'}, 'alt': {'axis_0': 'r', 'hat_0_up': 'k'}},
+                         layers={'alt': {'type': 'toggle', 'binding': 'button_1'}})
+    tick(mapper, axes={0: 0.9}, hats={0: (0, 1)})
+    assert mapper.held_actions == {'axis_0': 'q', 'hat_0_up': 'up'}
+    tick(mapper, buttons={1: 1})
+    assert mapper.held_actions == {'axis_0': 'r', 'hat_0_up': 'k'}
+    tick(mapper, buttons={1: 0}, axes={0: 0.0}, hats={0: (0, 0)})
+    assert mapper.held_actions == {}
+    assert mapper.key_actions.refcounts == [0] * len(mapper.key_actions.refcounts)
+
+
+def test_device_loss_releases_everything():
+    mapper = make_mapper({'on_foot': {'button_0': 'e', 'axis_1': 'throttle_rev'}})
+    tick(mapper, buttons={0: 1}, axes={1: 0.9})
+    mapper.release_all_inputs()
+    assert sorted(mapper.events) == [('press', 'e'), ('press', 's'), ('release', 'e'), ('release', 's')]
+    assert mapper.held_actions == {}
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("pynput")
+
+import Uni_Mapper as um
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def receiver():
+    receiver = um.NetworkInputReceiver(port=0, host='127.0.0.1')
+    receiver.start()
+    yield receiver
+    receiver.stop()
+
+
+def stream(sender, states, start=0.0, step=0.01):
+    for n, state in enumerate(states):
+        sender.send_state(state, now=start + n * step)
+        time.sleep(0.002)
+
+
+def test_sender_restart_resets_sequence_tracking(receiver):
+    port = receiver.address[1]
+    sender = um.NetworkInputSender('127.0.0.1', port)
+    stream(sender, [((n % 2, 0), (n / 20.0,), ((0, 0),)) for n in range(10)])
+    sender.seq += 2  # two packets lost on the wire
+    stream(sender, [((0, n % 2), (-n / 20.0,), ((1, 0),)) for n in range(10)], start=1.0)
+    assert wait_for(lambda: receiver.packets_received == 20)
+    sender.close()
+
+    # A restarted sender starts over at seq 0 from a new source port
+    restarted = um.NetworkInputSender('127.0.0.1', port)
+    stream(restarted, [((1, 1, 1), (0.5, -0.5), ((0, -1),)) for _ in range(5)], step=0.2)
+    assert wait_for(lambda: receiver.packets_received == 25)
+    restarted.close()
+
+    stats = receiver.stats()
+    assert stats['lost'] == 2
+    assert stats['stale'] == 0
+    assert stats['loss_pct'] == pytest.approx(100.0 * 2 / 27)
+    assert stats['rate_hz'] > 0
+    # Same clock on both ends, so the offset estimate is the true one-way delay
+    assert 0.0 <= stats['clock_offset_ms'] < 100.0
+    assert 0.0 <= stats['latency_ms_p95'] <= stats['latency_ms_max'] < 1000.0
+    assert 0.0 <= stats['latency_ms_avg'] <= stats['latency_ms_max']
+    assert stats['jitter_ms'] >= 0.0
+
+    device = receiver.device
+    assert (device.get_numbuttons(), device.get_numaxes(), device.get_numhats()) == (3, 2, 1)
+    assert [device.get_button(i) for i in range(3)] == [1, 1, 1]
+    assert device.get_axis(1) == pytest.approx(-0.5, abs=1e-3)
+    assert device.get_hat(0) == (0, -1)
+
+
+def test_keyframe_far_behind_from_same_peer_counts_as_restart():
+    receiver = um.NetworkInputReceiver()
+    peer = ('10.0.0.2', 50000)
+    counts = (1, 1, 0)
+    for seq in range(1000, 1010):
+        assert receiver.handle_packet(um.encode_input_packet(seq, time.time(), counts, [(0, 0, 1)]), peer)
+    keyframe = um.encode_input_packet(0, time.time(), counts, [(0, 0, 0), (1, 0, 0)], um.NET_FLAG_KEYFRAME)
+    assert receiver.handle_packet(keyframe, peer)
+    assert receiver.last_seq == 0
+    assert receiver.packets_lost == 0
+
+    # A late packet from just before the current sequence is still stale, not a restart
+    assert not receiver.handle_packet(um.encode_input_packet(4294967290, time.time(), counts, [], um.NET_FLAG_KEYFRAME), peer)
+    assert receiver.packets_stale == 1
+
+
+def test_latency_is_reported_over_the_estimated_clock_offset():
+    receiver = um.NetworkInputReceiver()
+    # Sender clock 5 s behind; one-way delays of 2, 4, 3 and 12 ms
+    for seq, delay in enumerate((0.002, 0.004, 0.003, 0.012)):
+        packet = um.encode_input_packet(seq, 1000.0 + seq, (1, 0, 0), [])
+        receiver.handle_packet(packet, ('10.0.0.2', 50000), received_at=1005.0 + seq + delay)
+    stats = receiver.stats()
+    assert stats['clock_offset_ms'] == pytest.approx(5002.0)
+    assert stats['latency_ms_avg'] == pytest.approx((0 + 2 + 1 + 10) / 4)
+    assert stats['latency_ms_p95'] == pytest.approx(2.0)
+    assert stats['latency_ms_max'] == pytest.approx(10.0)
+    assert stats['jitter_ms'] == pytest.approx((2 + 1 + 9) / 3)
+
+
+def test_second_host_is_rejected_until_the_first_times_out():
+    receiver = um.NetworkInputReceiver(timeout=1.0)
+    counts = (1, 0, 0)
+    packet = lambda seq: um.encode_input_packet(seq, time.time(), counts, [(0, 0, 1)], um.NET_FLAG_KEYFRAME)
+    assert receiver.handle_packet(packet(0), ('10.0.0.2', 50000))
+    assert not receiver.handle_packet(packet(0), ('10.0.0.3', 50000))
+    assert receiver.handle_packet(packet(0), ('10.0.0.2', 50001))  # same host, restarted sender
+    assert receiver.stats()['rejected'] == 1
+
+    receiver.last_packet_time -= 2.0
+    assert receiver.handle_packet(packet(0), ('10.0.0.3', 50000))
+    assert receiver.peer == ('10.0.0.3', 50000)
+
+
+def test_allowed_hosts():
+    locked = um.NetworkInputReceiver(port=0, host='127.0.0.1', allowed_hosts=['localhost'])
+    locked.start()
+    try:
+        packet = um.encode_input_packet(0, time.time(), (1, 0, 0), [(0, 0, 1)], um.NET_FLAG_KEYFRAME)
+        assert not locked.handle_packet(packet, ('10.0.0.2', 50000))
+        assert locked.handle_packet(packet, ('127.0.0.1', 50000))
+    finally:
+        locked.stop()
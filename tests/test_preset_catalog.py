@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pygame")
+pytest.importorskip("pynput")
+
+import Uni_Mapper as um
+
+
+def write_preset(folder, name, settings=None):
+    path = folder / f"{name}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'settings': settings or {}, 'mappings': {}}))
+    return path
+
+
+@pytest.fixture
+def presets(tmp_path):
+    folder = tmp_path / 'presets'
+    write_preset(folder, 'Elite Dangerous (X52)')
+    write_preset(folder, 'Elite Dangerous (Gamepad)')
+    write_preset(folder, 'sims/Flight Sim', {'game': 'Flight Simulator', 'device': 'Yoke'})
+    return folder
+
+
+def make_catalog(tmp_path, folder):
+    catalog = um.PresetCatalog(str(folder), str(tmp_path / 'preset_index.json'))
+    catalog.load_cache()
+    return catalog
+
+
+def test_metadata_comes_from_settings_or_file_name(tmp_path, presets):
+    catalog = make_catalog(tmp_path, presets)
+    assert catalog.refresh() == (3, 0)
+    by_name = {m['name']: m for m in catalog.search()}
+    assert by_name['Elite Dangerous (X52)']['game'] == 'Elite Dangerous'
+    assert by_name['Elite Dangerous (X52)']['device'] == 'X52'
+    assert by_name['sims/Flight Sim']['device'] == 'Yoke'
+
+
+def test_refresh_only_rereads_changed_files(tmp_path, presets, monkeypatch):
+    make_catalog(tmp_path, presets).refresh()
+    catalog = make_catalog(tmp_path, presets)
+    reads = []
+    original = um.PresetCatalog.extract_metadata
+    monkeypatch.setattr(um.PresetCatalog, 'extract_metadata', staticmethod(lambda path, name: reads.append(name) or original(path, name)))
+    assert catalog.refresh() == (0, 0)
+    assert reads == []
+
+    changed = presets / 'Elite Dangerous (X52).json'
+    changed.write_text(json.dumps({'settings': {'device': 'X56'}}))
+    os.utime(changed, (1, 1))
+    (presets / 'Elite Dangerous (Gamepad).json').unlink()
+    write_preset(presets, 'Star Citizen (HOTAS)')
+    assert catalog.refresh() == (2, 1)
+    assert sorted(reads) == ['Elite Dangerous (X52)', 'Star Citizen (HOTAS)']
+    assert [m['device'] for m in catalog.search('elite')] == ['X56']
+
+
+def test_search_narrows_incrementally_and_orders_by_last_used(tmp_path, presets):
+    catalog = make_catalog(tmp_path, presets)
+    catalog.refresh()
+    assert [m['name'] for m in catalog.search('')] == ['Elite Dangerous (Gamepad)', 'Elite Dangerous (X52)', 'sims/Flight Sim']
+    assert len(catalog.search('el')) == 2
+    assert catalog.last_query == 'el'
+    assert [m['name'] for m in catalog.search('elite x5')] == ['Elite Dangerous (X52)']
+    assert [m['name'] for m in catalog.search('yoke flight')] == ['sims/Flight Sim']
+
+    catalog.mark_used(str(presets / 'sims' / 'Flight Sim.json'))
+    assert catalog.search('')[0]['name'] == 'sims/Flight Sim'
+    reloaded = make_catalog(tmp_path, presets)
+    assert reloaded.search('')[0]['name'] == 'sims/Flight Sim'
+
+
+def test_damaged_index_entries_are_rescanned(tmp_path, presets):
+    make_catalog(tmp_path, presets).refresh()
+    index = tmp_path / 'preset_index.json'
+    data = json.loads(index.read_text())
+    del data['entries']['Elite Dangerous (X52).json']['mtime']
+    index.write_text(json.dumps(data))
+    catalog = make_catalog(tmp_path, presets)
+    assert len(catalog.entries) == 2
+    assert catalog.refresh() == (1, 0)
+
+
+def test_unreadable_presets_are_flagged(tmp_path, presets):
+    (presets / 'Broken.json').write_text('{not json')
+    catalog = make_catalog(tmp_path, presets)
+    catalog.refresh()
+    assert catalog.search('broken')[0]['invalid']
+
+
+def test_mark_used_during_refresh_is_kept(tmp_path, presets, monkeypatch):
+    catalog = make_catalog(tmp_path, presets)
+    catalog.refresh()
+    used = str(presets / 'Elite Dangerous (X52).json')
+    os.utime(used, (1, 1))
+    original = um.PresetCatalog.extract_metadata
+    def extract_while_used(path, name):
+        catalog.mark_used(used)  # the user loads it while the worker is scanning
+        return original(path, name)
+    monkeypatch.setattr(um.PresetCatalog, 'extract_metadata', staticmethod(extract_while_used))
+    catalog.refresh()
+    assert catalog.search('')[0]['name'] == 'Elite Dangerous (X52)'